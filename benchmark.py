@@ -0,0 +1,422 @@
+#!/usr/bin/env python3
+
+import argparse
+import bisect
+import json
+import logging
+import logging.handlers
+import os
+import platform
+import queue
+import socket
+import subprocess
+import threading
+import time
+import tracemalloc
+import uuid
+
+from glonax.client import (
+    HEADER,
+    HEADER_PADDING,
+    PROTOCOL_MAGIC,
+    Control,
+    Echo,
+    MessageType,
+    Request,
+    Session,
+    TcpConnection,
+    GlonaxClient,
+)
+from glonax.message import (
+    Engine,
+    EngineRecord,
+    Gnss,
+    GnssRecord,
+    Instance,
+    ModuleStatus,
+    ModuleStatusRecord,
+)
+from glonax.simulator import GlonaxSimulator
+
+import logconfig
+import main
+from changes import ChangeDetector
+from commands import Command
+from router import Router
+
+
+SAMPLES = {
+    "instance": Instance(
+        id=uuid.uuid4(),
+        model="Benchmark",
+        machine_type=1,
+        version=(1, 2, 3),
+        serial_number="BENCH0001",
+    ),
+    "status": ModuleStatus(name="encoder", state=1, error_code=0),
+    "engine": Engine(driver_demand=50, actual_engine=48, rpm=1200),
+    "gnss": Gnss(
+        location=(52.0, 5.0), altitude=12.0, speed=1.5, heading=90.0, satellites=12
+    ),
+    "control": Control(Control.ControlType.ENGINE_REQUEST, 1200),
+    "session": Session("benchmark/1.0"),
+    "request": Request(MessageType.ENGINE),
+    "echo": Echo(),
+}
+
+MODELS = {
+    "instance": Instance,
+    "status": ModuleStatus,
+    "engine": Engine,
+    "gnss": Gnss,
+    "control": Control,
+    "session": Session,
+    "request": Request,
+    "echo": Echo,
+}
+
+RECORDS = {
+    "status": ModuleStatusRecord,
+    "engine": EngineRecord,
+    "gnss": GnssRecord,
+}
+
+
+def rate(fn, duration: float) -> float:
+    """Calls `fn` repeatedly for `duration` seconds and returns calls per second."""
+    count = 0
+    batch = 1000
+    start = time.perf_counter()
+    deadline = start + duration
+    while True:
+        for _ in range(batch):
+            fn()
+        count += batch
+        now = time.perf_counter()
+        if now >= deadline:
+            return count / (now - start)
+
+
+def bench_codec(duration: float) -> dict:
+    results = {}
+
+    for name, sample in SAMPLES.items():
+        data = memoryview(sample.to_bytes())
+
+        decode = MODELS[name].from_bytes
+        results[f"codec.{name}.from_bytes"] = rate(lambda: decode(data), duration)
+        results[f"codec.{name}.to_bytes"] = rate(sample.to_bytes, duration)
+
+        if name in RECORDS:
+            decode_record = RECORDS[name].from_bytes
+            record = decode_record(data)
+            results[f"codec.{name}.record.from_bytes"] = rate(
+                lambda: decode_record(data), duration
+            )
+            results[f"codec.{name}.record.to_bytes"] = rate(record.to_bytes, duration)
+
+    return results
+
+
+def bench_memory(count: int = 10000) -> dict:
+    """Bytes retained per decoded message."""
+    results = {}
+
+    for name, decoders in [
+        ("status", (ModuleStatus, ModuleStatusRecord)),
+        ("engine", (Engine, EngineRecord)),
+        ("gnss", (Gnss, GnssRecord)),
+    ]:
+        data = memoryview(SAMPLES[name].to_bytes())
+
+        for kind, decoder in zip(("model", "record"), decoders):
+            tracemalloc.start()
+            before = tracemalloc.take_snapshot()
+            messages = [decoder.from_bytes(data) for _ in range(count)]
+            after = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+
+            size = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+            results[f"memory.{name}.{kind}.bytes"] = size / len(messages)
+
+    return results
+
+
+def bench_framing(count: int = 200000) -> dict:
+    """Frames per second through TcpConnection over a loopback socket."""
+    payload = SAMPLES["gnss"].to_bytes()
+    header = HEADER.pack(
+        PROTOCOL_MAGIC, MessageType.GNSS.value, len(payload), HEADER_PADDING
+    )
+    data = (header + payload) * count
+
+    listener = socket.create_server(("127.0.0.1", 0))
+
+    def serve():
+        peer, _ = listener.accept()
+        with peer:
+            peer.sendall(data)
+
+    threading.Thread(target=serve, daemon=True).start()
+
+    conn = TcpConnection("127.0.0.1", listener.getsockname()[1])
+    conn.connect()
+
+    start = time.perf_counter()
+    for _ in range(count):
+        conn.recv()
+    elapsed = time.perf_counter() - start
+
+    conn.close()
+    listener.close()
+
+    return {
+        "framing.frames_per_second": count / elapsed,
+        "framing.megabytes_per_second": len(data) / elapsed / 1e6,
+    }
+
+
+INBOUND = {
+    "command": json.dumps(
+        {
+            "type": "command",
+            "topic": "command",
+            "data": {"id": "1", "action": "engine_request", "value": 1200},
+            "timestamp": 1700000000.0,
+        }
+    ).encode(),
+    "signal": json.dumps(
+        {"type": "signal", "topic": "encoding", "data": {"encoding": "lxr"}}
+    ).encode(),
+    "unknown": json.dumps(
+        {"type": "signal", "topic": "unknown", "data": {"value": list(range(32))}}
+    ).encode(),
+    "invalid": b'{"type": "signal", "topic": ',
+}
+
+
+def bench_router(duration: float) -> dict:
+    """Inbound messages per second through the router, with no-op handlers."""
+    router = Router()
+    router.add("command", "command", lambda message: None, Command)
+    router.add("signal", "encoding", lambda message: None, main.EncodingData)
+
+    results = {}
+    for name, raw in INBOUND.items():
+        results[f"router.{name}.per_second"] = rate(
+            lambda: router.dispatch(raw), duration
+        )
+    return results
+
+
+def bench_logging(duration: float) -> dict:
+    """
+    Log calls per second on the calling thread through the `logconfig`
+    pipeline, for records that are queued and records the rate limit drops.
+    """
+    records = queue.Queue(logconfig.QUEUE_SIZE)
+
+    output = logging.StreamHandler(open(os.devnull, "w"))
+    output.setFormatter(logging.Formatter(logconfig.FORMAT))
+
+    handler = logconfig.LazyQueueHandler(records)
+    handler.addFilter(logconfig.RateLimitFilter(60))
+
+    log = logging.getLogger("benchmark")
+    log.propagate = False
+    log.addHandler(handler)
+    log.setLevel(logging.INFO)
+
+    listener = logging.handlers.QueueListener(records, output)
+    listener.start()
+
+    # Logging is disabled for the other benchmarks
+    disabled = logging.root.manager.disable
+    logging.disable(logging.NOTSET)
+
+    results = {}
+    try:
+        results["logging.queued.per_second"] = rate(
+            lambda: log.info("engine: %s", SAMPLES["engine"]), duration
+        )
+        results["logging.suppressed.per_second"] = rate(
+            lambda: log.info(
+                "engine: %s", SAMPLES["engine"], extra={"topic": "engine"}
+            ),
+            duration,
+        )
+    finally:
+        logging.disable(disabled)
+        listener.stop()
+        log.removeHandler(handler)
+        output.stream.close()
+
+    # Records that did not fit in the queue while the listener caught up
+    results["logging.queue_dropped"] = handler.dropped
+    return results
+
+
+class WebSocketStandIn:
+    """Records when each signal would have been sent upstream."""
+
+    def __init__(self):
+        # Topic to the observed timestamps and send times of its signals
+        self.sent: dict[str, list[tuple[float, float]]] = {}
+
+    def send(self, data, opcode=None):
+        now = time.time()
+        message = json.loads(data)
+        self.sent.setdefault(message["topic"], []).append((message["timestamp"], now))
+
+    def latencies(self, arrivals: dict[str, list[float]]) -> list[float]:
+        """
+        Latency of every frame from its arrival to the first send of its
+        topic that carries that frame's value or a newer one. Frames that
+        were coalesced count until their replacement was sent; frames that
+        never led to a send, such as unchanged values, are left out.
+        """
+        latencies = []
+        for topic, times in arrivals.items():
+            sent = sorted(self.sent.get(topic, []))
+            if not sent:
+                continue
+
+            observed = [timestamp for timestamp, _ in sent]
+            # Earliest send at or after every observed timestamp
+            earliest = [send for _, send in sent]
+            for i in range(len(earliest) - 2, -1, -1):
+                earliest[i] = min(earliest[i], earliest[i + 1])
+
+            for arrival in times:
+                i = bisect.bisect_left(observed, arrival)
+                if i < len(sent):
+                    latencies.append(earliest[i] - arrival)
+
+        return latencies
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def bench_bridge(duration: float, frame_rate: int = 2000) -> dict:
+    """
+    Latency from a frame arriving on the socket to its websocket send.
+
+    Runs the bridge service against the simulator with change detection
+    reduced to exact equality, so every changed value is forwarded.
+    """
+    simulator = GlonaxSimulator(
+        ("127.0.0.1", 0),
+        rates={MessageType.ENGINE: frame_rate, MessageType.GNSS: frame_rate},
+    )
+    threading.Thread(target=simulator.serve_forever, daemon=True).start()
+
+    stand_in = WebSocketStandIn()
+    main.ws = stand_in
+    main.is_connected = True
+    main.uplink.batch_interval = 0
+    main.uplink.start()
+
+    service = main.GlonaxService()
+    service.detector = ChangeDetector()
+
+    client = GlonaxClient("127.0.0.1", simulator.port, reconnect=False)
+
+    class Done(Exception):
+        pass
+
+    deadline = time.monotonic() + duration
+    frames = 0
+    arrivals: dict[str, list[float]] = {}
+
+    def on_message(client, message_type, message):
+        nonlocal frames
+        frames += 1
+        arrivals.setdefault(message_type.name.lower(), []).append(
+            client.conn.received_at
+        )
+        service(client, message_type, message)
+        if time.monotonic() > deadline:
+            raise Done
+
+    try:
+        client.listen(on_message)
+    except Done:
+        pass
+
+    main.uplink.stop(timeout=1)
+    client.conn.close()
+    simulator.shutdown()
+    simulator.server_close()
+
+    latencies = stand_in.latencies(arrivals)
+    stats = main.uplink.stats()
+    return {
+        "bridge.frames_per_second": frames / duration,
+        "bridge.sent": sum(map(len, stand_in.sent.values())),
+        "bridge.measured": len(latencies),
+        "bridge.coalesced": stats["coalesced"],
+        "bridge.latency.p50": percentile(latencies, 0.50),
+        "bridge.latency.p90": percentile(latencies, 0.90),
+        "bridge.latency.p99": percentile(latencies, 0.99),
+        "bridge.latency.max": max(latencies),
+    }
+
+
+def git_commit() -> str | None:
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        )
+        return result.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: dict, baseline: dict):
+    print(f"{'benchmark':<44} {'baseline':>14} {'current':>14} {'change':>8}")
+    for name, value in results.items():
+        old = baseline.get(name)
+        if not old:
+            continue
+        change = (value - old) / old * 100
+        print(f"{name:<44} {old:>14.6g} {value:>14.6g} {change:>+7.1f}%")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Glonax bridge benchmarks")
+    parser.add_argument("-o", "--output", default="benchmark.json")
+    parser.add_argument("--duration", type=float, default=0.5)
+    parser.add_argument("--compare", help="previous results to compare against")
+    args = parser.parse_args()
+
+    # Logging is measured by bench_logging, keep it out of the other numbers
+    logging.disable(logging.CRITICAL)
+
+    results = {}
+    results.update(bench_codec(args.duration))
+    results.update(bench_memory())
+    results.update(bench_framing())
+    results.update(bench_router(args.duration))
+    results.update(bench_logging(args.duration))
+    results.update(bench_bridge(args.duration * 4))
+
+    report = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "timestamp": time.time(),
+        "results": results,
+    }
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f)["results"])
+    else:
+        for name, value in results.items():
+            print(f"{name:<44} {value:>14.6g}")
@@ -0,0 +1,171 @@
+import collections
+import math
+import time
+
+
+class Deadband:
+    """
+    Tolerance within which a numeric field is considered unchanged.
+
+    A value has changed when it differs from the last forwarded value by more
+    than the absolute tolerance and by more than the relative tolerance
+    (a fraction of the last value). Tuples are compared element by element.
+    """
+
+    __slots__ = ("absolute", "relative")
+
+    def __init__(self, absolute: float = 0.0, relative: float = 0.0):
+        self.absolute = absolute
+        self.relative = relative
+
+    def changed(self, old, new) -> bool:
+        if isinstance(new, tuple):
+            return any(self.changed(o, n) for o, n in zip(old, new))
+
+        return abs(new - old) > max(self.absolute, self.relative * abs(old))
+
+
+class DistanceDeadband:
+    """
+    Tolerance in metres for a (latitude, longitude) pair in degrees.
+    """
+
+    __slots__ = ("metres",)
+
+    EARTH_RADIUS = 6371000.0
+
+    def __init__(self, metres: float):
+        self.metres = metres
+
+    def changed(self, old, new) -> bool:
+        # Equirectangular approximation, accurate enough for short distances
+        latitude = math.radians((old[0] + new[0]) / 2)
+        x = math.radians(new[1] - old[1]) * math.cos(latitude)
+        y = math.radians(new[0] - old[0])
+        return math.hypot(x, y) * self.EARTH_RADIUS > self.metres
+
+
+class TopicPolicy:
+    """
+    Change detection settings for a single topic.
+
+    Args:
+        fields (dict): Deadband per field. Fields without a deadband change
+            on any difference.
+        min_interval (float): Minimum number of seconds between two forwarded
+            values.
+        heartbeat (float | None): Maximum number of seconds without a
+            forwarded value, even if nothing changed.
+    """
+
+    __slots__ = ("fields", "min_interval", "heartbeat")
+
+    def __init__(
+        self,
+        fields: dict | None = None,
+        min_interval: float = 0.0,
+        heartbeat: float | None = None,
+    ):
+        self.fields = fields or {}
+        self.min_interval = min_interval
+        self.heartbeat = heartbeat
+
+    def changed(self, old: dict, new: dict) -> bool:
+        for field, value in new.items():
+            last = old.get(field)
+            if last is None or value is None:
+                if last is not value:
+                    return True
+                continue
+
+            deadband = self.fields.get(field)
+            if deadband is None:
+                if last != value:
+                    return True
+            elif deadband.changed(last, value):
+                return True
+
+        return False
+
+
+class ChangeDetector:
+    """
+    Decides which values are worth forwarding.
+
+    Values are tracked per topic and key, for example the module name of a
+    status message. Every value is compared against the last forwarded
+    value, so slow drift within the deadband still gets forwarded once it
+    adds up.
+    """
+
+    def __init__(self, policies: dict[str, TopicPolicy] | None = None):
+        self.policies = policies or {}
+        self.default_policy = TopicPolicy()
+
+        self._last: dict[tuple, tuple[dict, float]] = {}
+
+        self.forwarded = collections.Counter()
+        self.suppressed = collections.Counter()
+
+    def update(self, topic: str, key, values: dict, now: float | None = None) -> bool:
+        """
+        Records a new value and returns whether it should be forwarded.
+        """
+        if now is None:
+            now = time.monotonic()
+
+        policy = self.policies.get(topic, self.default_policy)
+
+        last = self._last.get((topic, key))
+        if last is None:
+            forward = True
+        else:
+            last_values, last_forwarded = last
+            elapsed = now - last_forwarded
+
+            if policy.heartbeat is not None and elapsed >= policy.heartbeat:
+                forward = True
+            elif elapsed < policy.min_interval:
+                forward = False
+            else:
+                forward = policy.changed(last_values, values)
+
+        if forward:
+            self._last[(topic, key)] = (values, now)
+            self.forwarded[topic] += 1
+        else:
+            self.suppressed[topic] += 1
+
+        return forward
+
+    def reset(self, topic: str | None = None):
+        """Forgets the forwarded values, so the next value of a topic is always forwarded."""
+        if topic is None:
+            self._last.clear()
+        else:
+            self._last = {k: v for k, v in self._last.items() if k[0] != topic}
+
+
+# Policies of the topics forwarded upstream by the bridge and the gateway.
+UPLINK_POLICIES = {
+    "status": TopicPolicy(heartbeat=15),
+    "gnss": TopicPolicy(
+        {
+            "location": DistanceDeadband(0.5),
+            "altitude": Deadband(absolute=1.0),
+            "speed": Deadband(absolute=0.2),
+            "heading": Deadband(absolute=2.0),
+        },
+        min_interval=1,
+        heartbeat=15,
+    ),
+    "engine": TopicPolicy(
+        {
+            "driver_demand": Deadband(absolute=2),
+            "actual_engine": Deadband(absolute=2),
+            "rpm": Deadband(absolute=25),
+        },
+        min_interval=0.5,
+        heartbeat=15,
+    ),
+}
@@ -0,0 +1,81 @@
+import struct
+import time
+
+from pydantic import BaseModel
+
+from glonax.client import HEADER, HEADER_PADDING, PROTOCOL_MAGIC, MessageType
+
+
+# Upstream encodings this bridge supports, in order of preference.
+UPSTREAM_ENCODINGS = ["lxr", "json"]
+
+TOPIC_TYPES = {
+    "status": MessageType.STATUS,
+    "gnss": MessageType.GNSS,
+    "engine": MessageType.ENGINE,
+}
+
+# Unix time in milliseconds at which the batch was sent.
+BATCH_HEADER = struct.Struct(">Q")
+
+
+class ChannelMessage(BaseModel):
+    type: str
+    topic: str
+    data: dict | None = None
+    # Unix time at which the value was observed
+    timestamp: float | None = None
+
+
+class Signal:
+    """
+    A value waiting to be sent upstream.
+
+    The value is a message model or record, or a plain dict for topics
+    without a Glonax message type. It is only serialized once the upstream
+    encoding is known.
+    """
+
+    __slots__ = ("topic", "value", "timestamp")
+
+    def __init__(self, topic: str, value, timestamp: float | None = None):
+        self.topic = topic
+        self.value = value
+        self.timestamp = time.time() if timestamp is None else timestamp
+
+    def to_message(self) -> ChannelMessage:
+        if isinstance(self.value, dict):
+            data = self.value
+        else:
+            data = self.value.model_dump()
+
+        return ChannelMessage(
+            type="signal", topic=self.topic, data=data, timestamp=self.timestamp
+        )
+
+
+def encode_json(signal: Signal) -> str:
+    return signal.to_message().model_dump_json()
+
+
+def encode_lxr(signals: list[Signal]) -> bytes:
+    """
+    Packs signals into a single binary upstream frame.
+
+    The frame starts with the send time as a big endian unsigned 64 bit Unix
+    timestamp in milliseconds, followed by one LXR frame per signal carrying
+    the native message payload. Only topics in `TOPIC_TYPES` can be packed.
+    """
+    data = bytearray(BATCH_HEADER.pack(round(time.time() * 1000)))
+
+    for signal in signals:
+        payload = signal.value.to_bytes()
+        data += HEADER.pack(
+            PROTOCOL_MAGIC,
+            TOPIC_TYPES[signal.topic].value,
+            len(payload),
+            HEADER_PADDING,
+        )
+        data += payload
+
+    return bytes(data)
@@ -0,0 +1,171 @@
+import time
+import logging
+from concurrent.futures import Future
+from typing import Any, Callable, Literal
+
+from pydantic import BaseModel, StrictBool, StrictInt, ValidationError
+
+from glonax import metrics
+from glonax.client import GlonaxClient
+from glonax.message import ENGINE_RPM_MAX
+from channel import ChannelMessage
+
+
+logger = logging.getLogger(__name__)
+
+COMMAND_TOPIC = "command"
+
+# Command actions mapped to the client control method and the value type.
+ACTIONS = {
+    "horn": ("horn", bool),
+    "lights": ("lights", bool),
+    "illumination": ("illumination", bool),
+    "hydraulic_lock": ("hydraulic_lock", bool),
+    "hydraulic_quick_disconnect": ("hydraulic_quick_disconnect", bool),
+    "engine_request": ("engine_request", int),
+}
+
+COMMANDS = metrics.REGISTRY.counter(
+    "bridge_commands_total", "Remote commands by outcome", ("action", "status")
+)
+COMMAND_SECONDS = metrics.REGISTRY.histogram(
+    "bridge_command_seconds", "Time to execute a remote command", ("action",)
+)
+COMMAND_LATENCY_SECONDS = metrics.REGISTRY.histogram(
+    "bridge_command_latency_seconds",
+    "Time from issuing a remote command to executing it",
+    ("action",),
+)
+
+
+class Command(BaseModel):
+    id: str
+    action: Literal[tuple(ACTIONS)]
+    # Strict, so strings such as "true" or "1" are rejected, not converted
+    value: StrictBool | StrictInt
+
+
+class CommandDispatcher:
+    """
+    Routes commands pushed over the upstream channel to the machine controls.
+
+    Every command is answered through `reply` with an acknowledgement
+    carrying its id, the outcome and how long it took. Commands are rejected
+    when they do not validate or while there is no connection to the Glonax
+    server. Otherwise the outcome is known once the control writer has sent
+    the control, and the acknowledgement is sent from the writer thread then.
+    `dispatch` never waits for the writer, so setpoints arriving in a burst
+    can be coalesced while the websocket keeps reading.
+    """
+
+    def __init__(self, client: GlonaxClient | None = None):
+        self.client = client
+
+    def _ack(
+        self, id: str | None, status: str, error: str | None = None, **timings
+    ) -> ChannelMessage:
+        data = {"id": id, "status": status, **timings}
+        if error:
+            data["error"] = error
+
+        return ChannelMessage(
+            type="ack", topic=COMMAND_TOPIC, data=data, timestamp=time.time()
+        )
+
+    def _validate(self, command: Command):
+        _, value_type = ACTIONS[command.action]
+        if value_type is bool:
+            if not isinstance(command.value, bool):
+                raise ValueError(f"{command.action} expects a boolean")
+        elif isinstance(command.value, bool) or not (
+            0 <= command.value <= ENGINE_RPM_MAX
+        ):
+            raise ValueError(
+                f"{command.action} expects an RPM in 0..{ENGINE_RPM_MAX}"
+            )
+
+    def dispatch(
+        self, message: ChannelMessage, reply: Callable[[ChannelMessage], Any]
+    ):
+        """
+        Executes a command message.
+
+        Args:
+            message (ChannelMessage): A message on the command topic.
+            reply (Callable): Sends the acknowledgement back upstream. Called
+                right away for rejected commands, otherwise from the control
+                writer thread once the control is sent.
+        """
+        received_at = time.time()
+        data = message.data or {}
+
+        try:
+            command = Command.model_validate(data)
+            self._validate(command)
+        except (ValidationError, ValueError) as e:
+            # The action is untrusted, only known actions get their own series
+            action = data.get("action")
+            if not (isinstance(action, str) and action in ACTIONS):
+                action = "invalid"
+            COMMANDS.labels(action, "rejected").inc()
+            logger.warning(f"Rejected command: {e}")
+            reply(self._ack(data.get("id"), "rejected", str(e)))
+            return
+
+        if self.client is None:
+            COMMANDS.labels(command.action, "rejected").inc()
+            reply(self._ack(command.id, "rejected", "Not connected"))
+            return
+
+        method, _ = ACTIONS[command.action]
+
+        start = time.perf_counter()
+        try:
+            future = getattr(self.client, method)(command.value)
+        except (ConnectionError, OSError) as e:
+            COMMANDS.labels(command.action, "failed").inc()
+            logger.error(f"Command {command.action} failed: {e}")
+            reply(self._ack(command.id, "failed", str(e)))
+            return
+
+        def on_done(future: Future):
+            try:
+                reply(self._outcome(message, command, future, received_at, start))
+            except Exception:
+                logger.exception(f"Failed to acknowledge command {command.id}")
+
+        future.add_done_callback(on_done)
+
+    def _outcome(
+        self,
+        message: ChannelMessage,
+        command: Command,
+        future: Future,
+        received_at: float,
+        start: float,
+    ) -> ChannelMessage:
+        """Returns the acknowledgement for a command whose control completed."""
+        if future.cancelled():
+            COMMANDS.labels(command.action, "failed").inc()
+            logger.error(f"Command {command.action} discarded by a shutdown")
+            return self._ack(command.id, "failed", "Discarded by a shutdown")
+
+        error = future.exception()
+        if error is not None:
+            COMMANDS.labels(command.action, "failed").inc()
+            logger.error(f"Command {command.action} failed: {error}")
+            return self._ack(command.id, "failed", str(error))
+
+        elapsed = time.perf_counter() - start
+        COMMAND_SECONDS.labels(command.action).observe(elapsed)
+        COMMANDS.labels(command.action, "ok").inc()
+
+        timings = {"execute": elapsed}
+        if message.timestamp is not None:
+            latency = received_at - message.timestamp + elapsed
+            COMMAND_LATENCY_SECONDS.labels(command.action).observe(max(0, latency))
+            timings["latency"] = latency
+
+        logger.info(f"Command {command.action}: {command.value}")
+
+        return self._ack(command.id, "ok", **timings)
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+
+import asyncio
+import configparser
+import logging
+from typing import Any, Awaitable, Callable
+
+import websockets
+
+import logconfig
+from glonax import client as gclient
+from glonax import metrics
+from glonax.async_client import AsyncGlonaxClient
+from glonax.client import GlonaxServiceBase
+from channel import Signal, encode_json
+from changes import UPLINK_POLICIES, ChangeDetector
+
+
+config = configparser.ConfigParser()
+logger = logging.getLogger()
+
+# Config sections describing a machine, the rest of the name is the instance.
+MACHINE_SECTION = "machine."
+
+MACHINES_CONNECTED = metrics.REGISTRY.gauge(
+    "gateway_machines_connected", "Machines with a live Glonax connection"
+)
+UPSTREAMS_CONNECTED = metrics.REGISTRY.gauge(
+    "gateway_upstreams_connected", "Machines with a live upstream channel"
+)
+FORWARDED = metrics.REGISTRY.counter(
+    "gateway_forwarded_total", "Signals forwarded upstream", ("topic",)
+)
+
+
+class MachineService(GlonaxServiceBase):
+    trusted = True
+
+    def __init__(self, machine: "Machine"):
+        self.machine = machine
+
+    def __call__(self, client, message_type, message):
+        super().__call__(client, message_type, message)
+
+        # Data flows, so the next connection loss starts a fresh backoff
+        if self.machine.backoff.attempts:
+            self.machine.backoff.reset()
+
+    def on_status(self, client, status):
+        self.machine.forward("status", status.name, status)
+
+    def on_gnss(self, client, gnss):
+        self.machine.forward("gnss", None, gnss)
+
+    def on_engine(self, client, engine):
+        self.machine.forward("engine", None, engine)
+
+
+class Upstream:
+    """
+    Upstream channel of one instance.
+
+    Messages wait in `pending` until the channel sends them. Only the
+    latest message per topic and key is kept, so the state stays bounded
+    while the channel is down.
+    """
+
+    def __init__(self, instance: str, uri: str):
+        self.instance = instance
+        self.uri = uri
+
+        self.pending: dict[tuple[str, str | None], str] = {}
+        self._ready = asyncio.Event()
+
+    def submit(self, topic: str, key: str | None, text: str):
+        self.pending[(topic, key)] = text
+        self._ready.set()
+
+    async def run(self):
+        backoff = gclient.Backoff()
+
+        while True:
+            try:
+                async with websockets.connect(self.uri) as ws:
+                    backoff.reset()
+                    UPSTREAMS_CONNECTED.inc()
+                    try:
+                        await self._serve(ws)
+                    finally:
+                        UPSTREAMS_CONNECTED.inc(-1)
+            except (OSError, websockets.WebSocketException) as e:
+                delay = backoff.next()
+                logger.warning(
+                    f"{self.instance}: upstream failed: {e}, "
+                    f"reconnecting in {delay:.1f}s"
+                )
+                await asyncio.sleep(delay)
+            except Exception:
+                delay = backoff.next()
+                logger.exception(
+                    f"{self.instance}: upstream failed, reconnecting in {delay:.1f}s"
+                )
+                await asyncio.sleep(delay)
+
+    async def _serve(self, ws):
+        """Sends and receives until either side stops, then stops the other."""
+        tasks = (
+            asyncio.create_task(self._send(ws)),
+            asyncio.create_task(self._receive(ws)),
+        )
+        try:
+            done, pending = await asyncio.wait(
+                tasks, return_when=asyncio.FIRST_COMPLETED
+            )
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        for task in done:
+            task.result()
+
+    async def _send(self, ws):
+        while True:
+            await self._ready.wait()
+            self._ready.clear()
+
+            messages, self.pending = self.pending, {}
+            try:
+                for key, text in list(messages.items()):
+                    await ws.send(text)
+                    # Sent, so it is not queued again if a later send fails
+                    del messages[key]
+                    FORWARDED.labels(key[0]).inc()
+            except (websockets.WebSocketException, asyncio.CancelledError):
+                # Keep the messages that did not make it, unless newer ones arrived
+                self.pending = messages | self.pending
+                self._ready.set()
+                raise
+
+    async def _receive(self, ws):
+        async for message in ws:
+            logger.debug(f"{self.instance}: received {message}")
+
+        raise ConnectionError("Upstream closed the channel")
+
+
+class Machine:
+    """
+    Glonax connection of one machine behind the gateway.
+
+    Changed values are serialized and passed to `sink` with their topic
+    and key, usually `Upstream.submit` of the same instance. The connection
+    is dropped and made again when nothing arrives for `timeout` seconds.
+    The reconnect backoff is only reset once a frame has been dispatched,
+    so a server that accepts and then drops connections is not hammered.
+    """
+
+    def __init__(
+        self,
+        instance: str,
+        address: str,
+        port: int,
+        sink: Callable[[str, str | None, str], Any],
+        timeout: float | None = None,
+    ):
+        self.instance = instance
+        self.address = address
+        self.port = port
+        self.sink = sink
+        self.timeout = timeout
+
+        self.detector = ChangeDetector(UPLINK_POLICIES)
+        self.backoff = gclient.Backoff()
+
+    def forward(self, topic: str, key: str | None, value):
+        if not self.detector.update(topic, key, value.model_dump()):
+            return
+
+        self.sink(topic, key, encode_json(Signal(topic, value)))
+
+    async def run(self):
+        backoff = self.backoff
+        service = MachineService(self)
+
+        while True:
+            client = AsyncGlonaxClient(self.address, self.port, timeout=self.timeout)
+            try:
+                await client.connect()
+            except Exception as e:
+                # Refused, or a corrupted handshake reply
+                await client.close()
+
+                delay = backoff.next()
+                logger.warning(
+                    f"{self.instance}: connection failed: {e}, "
+                    f"retrying in {delay:.1f}s"
+                )
+                await asyncio.sleep(delay)
+                continue
+
+            MACHINES_CONNECTED.inc()
+            logger.info(f"{self.instance}: connected to {self.address}")
+
+            try:
+                await client.listen(service)
+            except OSError as e:
+                logger.warning(f"{self.instance}: connection lost: {e}")
+            except Exception:
+                logger.exception(f"{self.instance}: connection failed")
+            finally:
+                MACHINES_CONNECTED.inc(-1)
+                await client.close()
+
+            # Do not spin on a server that keeps dropping or breaking us
+            await asyncio.sleep(backoff.next())
+
+
+async def keep_running(name: str, run: Callable[[], Awaitable]):
+    """
+    Awaits `run()` again whenever it raises, so one failing machine or
+    channel does not take the others down.
+    """
+    backoff = gclient.Backoff()
+
+    while True:
+        try:
+            await run()
+        except Exception:
+            delay = backoff.next()
+            logger.exception(f"{name} failed, restarting in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+
+def load_machines() -> list[tuple[str, str, int]]:
+    """Returns the instance, address and port of every configured machine."""
+    machines = []
+    for section in config.sections():
+        if not section.startswith(MACHINE_SECTION):
+            continue
+
+        machines.append(
+            (
+                section[len(MACHINE_SECTION) :],
+                config.get(section, "address", fallback="localhost"),
+                config.getint(section, "port", fallback=30051),
+            )
+        )
+    return machines
+
+
+async def run(
+    machines: list[tuple[str, str, int]], upstream: str, timeout: float | None = None
+):
+    """
+    Serves all machines from the running event loop.
+
+    Args:
+        machines (list): Instance, address and port per machine.
+        upstream (str): Upstream URI, `{instance}` is replaced per machine.
+        timeout (float | None): Seconds without data before a machine
+            connection is considered lost.
+    """
+    tasks = []
+    for instance, address, port in machines:
+        channel = Upstream(instance, upstream.format(instance=instance))
+        machine = Machine(instance, address, port, channel.submit, timeout)
+
+        tasks.append(
+            asyncio.create_task(keep_running(f"{instance}: upstream", channel.run))
+        )
+        tasks.append(
+            asyncio.create_task(keep_running(f"{instance}: machine", machine.run))
+        )
+
+    await asyncio.gather(*tasks)
+
+
+if __name__ == "__main__":
+    config.read("config.ini")
+
+    logconfig.setup(
+        config.get("logging", "level", fallback="INFO"),
+        config.getfloat("logging", "interval", fallback=5),
+    )
+
+    metrics_port = config.getint("metrics", "port", fallback=9108)
+    if metrics_port:
+        metrics.serve(metrics_port)
+
+    machines = load_machines()
+    upstream = config.get(
+        "gateway", "upstream", fallback="ws://localhost:8000/{instance}/ws"
+    )
+    timeout = config.getfloat("gateway", "timeout", fallback=10)
+    logger.info(f"Gateway serving {len(machines)} machines")
+
+    asyncio.run(run(machines, upstream, timeout))
@@ -0,0 +1,287 @@
+import asyncio
+import inspect
+import time
+import logging
+from typing import Any, Callable
+
+from glonax.client import (
+    APPLICATION_TYPES,
+    FRAME_BUFFER_INITIAL,
+    FRAME_BUFFER_SIZE,
+    HEADER,
+    HEADER_PADDING,
+    PROTOCOL_MAGIC,
+    Control,
+    DecodeError,
+    Echo,
+    FrameReader,
+    MessageType,
+    Request,
+    Session,
+)
+from glonax.message import Instance
+
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncGlonaxClient:
+    """
+    Glonax client built on asyncio streams.
+
+    Mirrors `GlonaxClient`, but every network operation is a coroutine so the
+    client can share an event loop with other connections. Application
+    messages are consumed with `async for`:
+
+        async with AsyncGlonaxClient("localhost") as client:
+            async for message_type, message in client:
+                ...
+
+    Payloads are views into the receive buffer and are only valid until the
+    next message is requested. With a `timeout`, a connection on which
+    nothing arrives for that many seconds is considered lost, so a half-open
+    connection does not hang forever.
+    """
+
+    def __init__(
+        self,
+        address: str = "localhost",
+        port: str | int = 30051,
+        user_agent: str = "pyglonax/0.2",
+        on_connect: Callable[[Any], None] | None = None,
+        on_message: Callable[[Any, MessageType, bytes], None] | None = None,
+        on_close: Callable[[Any, Any], None] | None = None,
+        timeout: float | None = None,
+    ):
+        self.server_ip = address
+        self.server_port = port
+        self.user_agent = user_agent
+        self.timeout = timeout
+
+        self.on_connect = on_connect
+        self.on_message = on_message
+        self.on_close = on_close
+
+        self.machine: Instance | None = None
+        self.subscriptions = APPLICATION_TYPES
+
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+        # Allocated on connect, so an idle client stays small
+        self._frames: FrameReader | None = None
+        self._pending = []
+        self._pending_index = 0
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> tuple[MessageType, memoryview]:
+        while True:
+            message_type, message = await self.recv()
+            if message_type in self.subscriptions:
+                return message_type, message
+
+    async def connect(self):
+        logger.debug(f"Connecting to {self.server_ip}:{self.server_port}")
+
+        self._reader, self._writer = await asyncio.open_connection(
+            self.server_ip, self.server_port
+        )
+        self._frames = FrameReader(FRAME_BUFFER_INITIAL, FRAME_BUFFER_SIZE)
+        self._pending = []
+        self._pending_index = 0
+
+        logger.debug("Connected to the Glonax server")
+
+        latency = await self.ping()
+        logger.debug(f"Conection latency: {latency:.2f} seconds")
+
+        await self._handshake()
+
+        if self.on_connect:
+            await _maybe_await(self.on_connect(self))
+
+    async def close(self):
+        if self._writer is None:
+            return
+
+        self._writer.close()
+        try:
+            await self._writer.wait_closed()
+        except OSError:
+            pass
+        finally:
+            self._writer = None
+
+        if self.on_close:
+            await _maybe_await(self.on_close(self, None))
+
+    async def send(self, type: MessageType, data: bytes):
+        header = HEADER.pack(PROTOCOL_MAGIC, type.value, len(data), HEADER_PADDING)
+
+        self._writer.write(header + data)
+        await self._writer.drain()
+
+    async def recv(self) -> tuple[MessageType, memoryview]:
+        """
+        Receives the next frame from the server.
+
+        Raises:
+            ConnectionError: If the server closed the connection.
+            TimeoutError: If nothing was received within `timeout` seconds.
+        """
+        while self._pending_index == len(self._pending):
+            read = self._reader.read(len(self._frames.writable()))
+            if self.timeout is not None:
+                try:
+                    data = await asyncio.wait_for(read, self.timeout)
+                except asyncio.TimeoutError:
+                    raise TimeoutError(
+                        f"Nothing received from the Glonax server in {self.timeout}s"
+                    ) from None
+            else:
+                data = await read
+            if not data:
+                raise ConnectionError("Connection closed by the Glonax server")
+
+            self._frames.feed(data)
+            self._pending = self._frames.frames()
+            self._pending_index = 0
+
+        frame = self._pending[self._pending_index]
+        self._pending_index += 1
+        return frame
+
+    async def ping(self) -> float:
+        """
+        Sends an echo message to the server and measures the elapsed time for the response.
+
+        Returns:
+            float: The elapsed time in seconds.
+        """
+        snd_echo = Echo()
+        start_time = time.time()
+        await self.send(MessageType.ECHO, snd_echo.to_bytes())
+
+        message_type, message = await self.recv()
+        end_time = time.time()
+        if message_type == MessageType.ECHO:
+            rcv_echo = Echo.from_bytes(message)
+            if snd_echo != rcv_echo:
+                logger.warning("Invalid echo response from server")
+
+        return end_time - start_time
+
+    async def _handshake(self):
+        """
+        Performs the handshake process with the Glonax server.
+
+        Sends a session message and sets the `machine` attribute when the
+        server answers with an instance message.
+        """
+        session = Session(self.user_agent)
+        await self.send(MessageType.SESSION, session.to_bytes())
+
+        message_type, message = await self.recv()
+        if message_type == MessageType.INSTANCE:
+            self.machine = Instance.from_bytes(message)
+
+            logger.debug(f"Instance ID: {self.machine.id}")
+            logger.debug(f"Instance model: {self.machine.model}")
+            logger.debug(f"Instance type: {self.machine.machine_type}")
+            logger.debug(
+                f"Instance version: {self.machine.version[0]}.{self.machine.version[1]}.{self.machine.version[2]}"
+            )
+            logger.debug(f"Instance serial number: {self.machine.serial_number}")
+
+    async def _control(self, type: Control.ControlType, value):
+        await self.send(MessageType.CONTROL, Control(type, value).to_bytes())
+
+    async def horn(self, value: bool):
+        """
+        Sends a control message to activate the machine horn.
+
+        Args:
+            value (bool): The value to set the machine horn.
+        """
+        await self._control(Control.ControlType.MACHINE_HORN, value)
+
+    async def lights(self, value: bool):
+        """
+        Sends a control message to activate the machine lights.
+
+        Args:
+            value (bool): The value to set the machine lights.
+        """
+        await self._control(Control.ControlType.MACHINE_LIGHTS, value)
+
+    async def illumination(self, value: bool):
+        """
+        Controls the machine illumination.
+
+        Args:
+            value (bool): The value to set for the machine illumination.
+        """
+        await self._control(Control.ControlType.MACHINE_ILLUMINATION, value)
+
+    async def hydraulic_lock(self, value: bool):
+        await self._control(Control.ControlType.HYDRAULIC_LOCK, value)
+
+    async def hydraulic_quick_disconnect(self, value: bool):
+        await self._control(Control.ControlType.HYDRAULIC_QUICK_DISCONNECT, value)
+
+    async def engine_request(self, value: int):
+        await self._control(Control.ControlType.ENGINE_REQUEST, value)
+
+    async def subscribe(self, types):
+        """
+        Asks the server to only send the given application message types.
+
+        Args:
+            types: The message types to receive.
+        """
+        self.subscriptions = frozenset(types)
+
+        for message_type in self.subscriptions:
+            await self.send(MessageType.REQUEST, Request(message_type).to_bytes())
+
+    async def listen(
+        self, on_message: Callable[[Any, MessageType, bytes], None] | None = None
+    ):
+        """
+        Dispatches application messages until the connection is closed.
+
+        The handler may be a plain callable, such as a `GlonaxServiceBase`,
+        or a coroutine function. Messages the handler fails to decode are
+        logged and skipped.
+        """
+        if on_message:
+            self.on_message = on_message
+
+        subscriptions = getattr(self.on_message, "subscriptions", None)
+        if subscriptions is not None:
+            await self.subscribe(subscriptions)
+
+        async for message_type, message in self:
+            if self.on_message:
+                try:
+                    await _maybe_await(self.on_message(self, message_type, message))
+                except DecodeError as e:
+                    logger.warning(
+                        "Invalid %s message: %s",
+                        message_type,
+                        e,
+                        extra={"topic": "decode"},
+                    )
+
+
+async def _maybe_await(result):
+    if inspect.isawaitable(result):
+        await result
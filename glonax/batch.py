@@ -0,0 +1,105 @@
+import numpy as np
+
+from glonax.client import HEADER, HEADER_PADDING, PROTOCOL_MAGIC, MessageType
+from glonax.message import ENGINE, GNSS
+
+
+# Structured dtypes matching the wire layout of the fixed size messages.
+ENGINE_DTYPE = np.dtype(
+    [
+        ("driver_demand", "u1"),
+        ("actual_engine", "u1"),
+        ("rpm", ">u2"),
+    ]
+)
+
+GNSS_DTYPE = np.dtype(
+    [
+        ("location", "=f4", (2,)),
+        ("altitude", "=f4"),
+        ("speed", "=f4"),
+        ("heading", "=f4"),
+        ("satellites", "u1"),
+    ]
+)
+
+DTYPES = {
+    MessageType.ENGINE: ENGINE_DTYPE,
+    MessageType.GNSS: GNSS_DTYPE,
+}
+
+assert ENGINE_DTYPE.itemsize == ENGINE.size
+assert GNSS_DTYPE.itemsize == GNSS.size
+
+
+def _dtype(message_type: MessageType) -> np.dtype:
+    try:
+        return DTYPES[message_type]
+    except KeyError:
+        raise ValueError(f"{message_type} is not a fixed size message type")
+
+
+def decode(message_type: MessageType, payloads) -> np.ndarray:
+    """
+    Decodes many payloads of a fixed size message type in one pass.
+
+    Args:
+        message_type (MessageType): Either `MessageType.ENGINE` or `MessageType.GNSS`.
+        payloads: A sequence of payloads, or a single buffer holding the
+            payloads back to back.
+
+    Returns:
+        np.ndarray: A structured array with one row per payload.
+    """
+    dtype = _dtype(message_type)
+
+    if isinstance(payloads, (bytes, bytearray, memoryview)):
+        data = payloads
+    else:
+        # Generators would be consumed by the length check
+        payloads = list(payloads)
+        if any(len(payload) != dtype.itemsize for payload in payloads):
+            raise ValueError(f"Payloads must be {dtype.itemsize} bytes")
+        data = b"".join(payloads)
+
+    if len(data) % dtype.itemsize:
+        raise ValueError(f"Buffer is not a multiple of {dtype.itemsize} bytes")
+
+    return np.frombuffer(data, dtype=dtype)
+
+
+def encode_payloads(message_type: MessageType, array: np.ndarray) -> bytes:
+    """
+    Encodes a structured array into payloads laid out back to back.
+    """
+    return np.ascontiguousarray(array, dtype=_dtype(message_type)).tobytes()
+
+
+def encode_frames(message_type: MessageType, array: np.ndarray) -> bytes:
+    """
+    Encodes a structured array into complete LXR frames.
+
+    The result can be written to a socket as is, which makes it suitable to
+    replay recorded telemetry or to drive a simulator.
+    """
+    dtype = _dtype(message_type)
+
+    frame_dtype = np.dtype(
+        [
+            ("magic", "S4"),
+            ("type", "u1"),
+            ("length", ">u2"),
+            ("padding", "S3"),
+            ("payload", dtype),
+        ]
+    )
+    assert frame_dtype.itemsize == HEADER.size + dtype.itemsize
+
+    frames = np.empty(len(array), dtype=frame_dtype)
+    frames["magic"] = PROTOCOL_MAGIC
+    frames["type"] = message_type.value
+    frames["length"] = dtype.itemsize
+    frames["padding"] = HEADER_PADDING
+    frames["payload"] = array
+
+    return frames.tobytes()
@@ -0,0 +1,181 @@
+import contextlib
+import mmap
+import struct
+import time
+import logging
+from typing import Any, Callable, Iterator
+
+from glonax.client import MessageType
+
+
+logger = logging.getLogger(__name__)
+
+CAPTURE_MAGIC = b"LXRCAP"
+CAPTURE_VERSION = 1
+
+# Magic, version, padding and the Unix time at which the capture started.
+CAPTURE_HEADER = struct.Struct(">6sBxd")
+
+# Nanoseconds since the start of the capture, message type and payload length.
+RECORD_HEADER = struct.Struct(">QBH")
+
+
+class CaptureWriter:
+    """
+    Writes raw LXR frames to a capture file.
+
+    Every frame is stored with its message type, payload and the monotonic
+    time since the capture started, so it can be replayed with the original
+    timing.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.count = 0
+
+        self._file = open(path, "wb")
+        self._file.write(
+            CAPTURE_HEADER.pack(CAPTURE_MAGIC, CAPTURE_VERSION, time.time())
+        )
+        self._start = time.monotonic_ns()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def write(self, message_type: MessageType, payload: bytes):
+        elapsed = time.monotonic_ns() - self._start
+
+        header = RECORD_HEADER.pack(elapsed, message_type.value, len(payload))
+        self._file.write(header)
+        self._file.write(payload)
+        self.count += 1
+
+    def close(self):
+        self._file.close()
+
+
+class CaptureReader:
+    """
+    Reads frames from a capture file.
+
+    Iterating yields the nanoseconds since the start of the capture, the
+    message type and the payload as a view into the memory mapped file. The
+    view is released when the next frame is requested.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, self.started_at = CAPTURE_HEADER.unpack_from(self._map)
+        if magic != CAPTURE_MAGIC:
+            raise ValueError("Not a capture file")
+        if version != CAPTURE_VERSION:
+            raise ValueError(f"Unsupported capture version {version}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __iter__(self) -> Iterator[tuple[int, MessageType, memoryview]]:
+        view = memoryview(self._map)
+        offset = CAPTURE_HEADER.size
+        end = len(self._map)
+
+        try:
+            while offset + RECORD_HEADER.size <= end:
+                elapsed, message_type, length = RECORD_HEADER.unpack_from(
+                    view, offset
+                )
+                offset += RECORD_HEADER.size
+
+                if offset + length > end:
+                    logger.warning("Capture file is truncated")
+                    break
+
+                payload = view[offset : offset + length]
+                try:
+                    yield elapsed, MessageType(message_type), payload
+                finally:
+                    payload.release()
+
+                offset += length
+        finally:
+            view.release()
+
+    def close(self):
+        self._map.close()
+
+
+def replay(
+    path: str,
+    on_message: Callable[[Any, MessageType, bytes], None],
+    client: Any = None,
+    speed: float | None = 1.0,
+) -> tuple[int, float]:
+    """
+    Feeds a capture through a message handler, such as a `GlonaxServiceBase`.
+
+    Args:
+        path (str): The capture file.
+        on_message (Callable): Called with the client, message type and payload.
+        client: Passed to the handler in place of a connected client.
+        speed (float | None): Playback speed relative to the recording. Use
+            None to replay as fast as possible.
+
+    Returns:
+        tuple[int, float]: The number of frames replayed and the elapsed seconds.
+    """
+    count = 0
+    start = time.monotonic_ns()
+
+    # Close the iterator before the reader, so a failing handler does not
+    # leave views into the map behind
+    with CaptureReader(path) as reader, contextlib.closing(iter(reader)) as frames:
+        for elapsed, message_type, message in frames:
+            if speed:
+                delay = elapsed / speed - (time.monotonic_ns() - start)
+                if delay > 0:
+                    time.sleep(delay / 1e9)
+
+            on_message(client, message_type, message)
+            count += 1
+
+    return count, (time.monotonic_ns() - start) / 1e9
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from glonax.client import GlonaxServiceBase
+
+    class NullService(GlonaxServiceBase):
+        trusted = True
+
+        def on_status(self, client, status):
+            pass
+
+        def on_gnss(self, client, gnss):
+            pass
+
+        def on_engine(self, client, engine):
+            pass
+
+    parser = argparse.ArgumentParser(description="Replay a Glonax capture file")
+    parser.add_argument("path")
+    parser.add_argument(
+        "--speed", type=float, default=0, help="playback speed, 0 for maximum"
+    )
+    args = parser.parse_args()
+
+    count, elapsed = replay(args.path, NullService(), speed=args.speed or None)
+    print(f"Replayed {count} frames in {elapsed:.3f}s")
+    if elapsed:
+        print(f"Throughput: {count / elapsed:.0f} frames/s")
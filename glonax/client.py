@@ -1,14 +1,21 @@
+import collections
 import datetime
 import socket
 import struct
+import threading
 import time
 import uuid
 import logging
+from concurrent.futures import Future
 from enum import Enum
 from time import sleep
 from typing import Any, Callable
 from abc import abstractmethod
-from random import randbytes
+from random import randbytes, random
+
+from glonax import metrics
+from glonax.rtt import RttMonitor
+from glonax.writer import URGENT, ControlWriter
 
 
 logger = logging.getLogger(__name__)
@@ -65,15 +72,15 @@ class Packet:
 
 
 class Echo(Packet):
-    def __init__(self):
-        self.data = randbytes(4)
+    def __init__(self, data: bytes | None = None):
+        self.data = randbytes(4) if data is None else data
 
     def to_bytes(self):
         return self.data
 
     def from_bytes(data):
         echo = Echo()
-        echo.data = data
+        echo.data = bytes(data)
         return echo
 
     def __eq__(self, __value: object) -> bool:
@@ -91,7 +98,7 @@ class Session(Packet):
         return data
 
     def from_bytes(data):
-        name = data[1:].decode("utf-8")
+        name = str(data[1:], "utf-8")
         return Session(name)
 
 
@@ -140,6 +147,7 @@ class Control(Packet):
 
     def from_bytes(data):
         type = Control.ControlType(data[0])
+        value = None
         if type == Control.ControlType.ENGINE_REQUEST:
             value = struct.unpack(">H", data[1:3])[0]
         elif type == Control.ControlType.HYDRAULIC_QUICK_DISCONNECT:
@@ -155,20 +163,246 @@ class Control(Packet):
         return Control(type, value)
 
 
+PROTOCOL_MAGIC = b"LXR\x03"
+
+# Magic, message type, payload length and three bytes of padding.
+HEADER = struct.Struct(">4sBH3s")
+HEADER_PADDING = b"\x00\x00\x00"
+
+FRAME_BUFFER_SIZE = 256 * 1024
+
+# Initial buffer of readers that grow on demand, such as the async client.
+FRAME_BUFFER_INITIAL = 4 * 1024
+
+
+RECV_SECONDS = metrics.REGISTRY.histogram(
+    "glonax_recv_seconds", "Time spent reading from the socket, including waiting"
+)
+FRAMES_RECEIVED = metrics.REGISTRY.counter(
+    "glonax_frames_received_total", "Frames received from the server", ("type",)
+)
+DECODE_SECONDS = metrics.REGISTRY.histogram(
+    "glonax_decode_seconds", "Time spent decoding messages", ("type",)
+)
+HANDLER_SECONDS = metrics.REGISTRY.histogram(
+    "glonax_handler_seconds", "Time spent in service handlers", ("type",)
+)
+
+
+class FrameReader:
+    """
+    Splits a byte stream into LXR frames using a single reusable buffer.
+
+    Bytes are received straight into the buffer with `recv_into`, and every
+    complete frame found after a read is returned as a memoryview into that
+    buffer. When the stream is corrupted the reader skips ahead to the next
+    protocol magic instead of giving up on the connection.
+
+    The returned payloads are only valid until the buffer is refilled, so
+    callers must consume them (or copy them) before reading again.
+
+    The buffer starts at `size` bytes and doubles whenever it is full, up
+    to `maximum`. A small initial size keeps idle connections cheap.
+    """
+
+    def __init__(self, size: int = FRAME_BUFFER_SIZE, maximum: int | None = None):
+        self.maximum = max(size, maximum or size)
+        if self.maximum < HEADER.size + 0xFFFF:
+            raise ValueError("Buffer too small to hold a maximum size frame")
+
+        self._buffer = bytearray(size)
+        self._view = memoryview(self._buffer)
+        self._start = 0
+        self._end = 0
+
+        self.discarded = 0
+
+    def __len__(self) -> int:
+        return self._end - self._start
+
+    def writable(self) -> memoryview:
+        """
+        Returns the free tail of the buffer, compacting pending bytes first.
+
+        Compacting moves unconsumed bytes to the front of the buffer, and a
+        full buffer is replaced by one twice the size. Both invalidate any
+        payload views handed out before.
+        """
+        if self._start:
+            pending = self._end - self._start
+            self._buffer[:pending] = bytes(self._view[self._start : self._end])
+            self._start = 0
+            self._end = pending
+
+        if self._end == len(self._buffer) < self.maximum:
+            # Payload views may still export the old buffer, so copy it
+            buffer = bytearray(min(len(self._buffer) * 2, self.maximum))
+            buffer[: self._end] = self._buffer
+            self._buffer = buffer
+            self._view = memoryview(buffer)
+
+        return self._view[self._end :]
+
+    def commit(self, size: int):
+        """Marks `size` bytes written into `writable()` as received."""
+        self._end += size
+
+    def feed(self, data: bytes) -> int:
+        """
+        Copies received bytes into the buffer.
+
+        Returns:
+            int: The number of bytes accepted, which can be less than `len(data)`
+            when the buffer is full.
+        """
+        target = self.writable()
+        size = min(len(data), len(target))
+        target[:size] = data[:size]
+        self.commit(size)
+        return size
+
+    def fill(self, sock: socket.socket) -> int:
+        """
+        Receives as many bytes as the kernel has available.
+
+        Raises:
+            ConnectionError: If the peer closed the connection.
+        """
+        size = sock.recv_into(self.writable())
+        if size == 0:
+            raise ConnectionError("Connection closed by the Glonax server")
+
+        self.commit(size)
+        return size
+
+    def frames(self) -> list[tuple[MessageType, memoryview]]:
+        """
+        Returns every complete frame in the buffer.
+
+        Incomplete frames stay buffered until more bytes arrive.
+        """
+        frames = []
+
+        buffer = self._buffer
+        view = self._view
+        start = self._start
+        end = self._end
+
+        while end - start >= HEADER.size:
+            magic, message_type, message_length, padding = HEADER.unpack_from(
+                buffer, start
+            )
+
+            if magic != PROTOCOL_MAGIC or padding != HEADER_PADDING:
+                start = self._resync(start + 1, end)
+                continue
+
+            try:
+                message_type = MessageType(message_type)
+            except ValueError:
+                start = self._resync(start + 1, end)
+                continue
+
+            frame_end = start + HEADER.size + message_length
+            if frame_end > end:
+                break
+
+            frames.append((message_type, view[start + HEADER.size : frame_end]))
+            start = frame_end
+
+        self._start = start
+        return frames
+
+    def _resync(self, start: int, end: int) -> int:
+        offset = self._buffer.find(PROTOCOL_MAGIC, start, end)
+        if offset == -1:
+            # Keep a possible partial magic at the end of the buffer
+            offset = max(start, end - len(PROTOCOL_MAGIC) + 1)
+
+        skipped = offset - start + 1
+        self.discarded += skipped
+
+        logger.warning(
+            "Invalid frame, skipped %d bytes to resynchronize",
+            skipped,
+            extra={"topic": "resync"},
+        )
+
+        return offset
+
+
+class Backoff:
+    """
+    Exponential backoff with jitter.
+
+    Every call to `next` doubles the delay up to `maximum`. The returned
+    delay is randomly reduced by up to `jitter` of its value, so clients that
+    lost the server at the same time do not reconnect in lockstep.
+    """
+
+    def __init__(
+        self,
+        initial: float = 0.5,
+        maximum: float = 30.0,
+        factor: float = 2.0,
+        jitter: float = 0.5,
+    ):
+        self.initial = initial
+        self.maximum = maximum
+        self.factor = factor
+        self.jitter = jitter
+
+        self.attempts = 0
+
+    def next(self) -> float:
+        delay = min(self.maximum, self.initial * self.factor**self.attempts)
+        self.attempts += 1
+        return delay * (1 - self.jitter * random())
+
+    def reset(self):
+        self.attempts = 0
+
+
 class TcpConnection:
     def __init__(
         self,
         address: str = "localhost",
         port: str | int = 30051,
         on_connect: Callable[[Any], None] | None = None,
+        timeout: float | None = None,
     ):
         self.server_ip = address
         self.server_port = port
+        self.timeout = timeout
 
         self.on_connect = on_connect
 
+        self.sock: socket.socket | None = None
+        self.reader = FrameReader()
+        self._pending = collections.deque()
+        self._send_lock = threading.Lock()
+
+        self._recv_seconds = RECV_SECONDS.labels()
+        self._frames_received = {
+            message_type: FRAMES_RECEIVED.labels(message_type.name.lower())
+            for message_type in MessageType
+        }
+
+        # Receives every frame read from the socket, see `GlonaxClient.start_capture`
+        self.capture = None
+
+        # Unix time at which the frames last returned by `recv` were read
+        self.received_at: float | None = None
+
     def connect(self):
+        self.close()
+
         self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        self.sock.settimeout(self.timeout)
+
+        self.reader = FrameReader()
+        self._pending.clear()
 
         logger.debug(f"Connecting to {self.server_ip}:{self.server_port}")
 
@@ -179,55 +413,83 @@ class TcpConnection:
         if self.on_connect:
             self.on_connect()
 
+    def close(self):
+        if self.sock:
+            self.sock.close()
+            self.sock = None
+
     def send(self, type, data):
-        header = b"LXR\x03"
-        header += struct.pack("B", type.value)
-        header += struct.pack(">H", len(data))
+        header = HEADER.pack(PROTOCOL_MAGIC, type.value, len(data), HEADER_PADDING)
 
-        header += b"\x00\x00\x00"
+        with self._send_lock:
+            if self.sock is None:
+                raise ConnectionError("Not connected to the Glonax server")
+            self.sock.sendall(header + data)
 
-        self.sock.sendall(header + data)
+    def recv(self) -> tuple[MessageType, memoryview]:
+        """
+        Receives the next frame from the server.
 
-    def recv(self) -> tuple[MessageType, bytes]:
-        header = self.sock.recv(10)
+        All frames that arrived with a single read are queued, so most calls
+        return without touching the socket. The payload is a view into the
+        receive buffer and is only valid until the next call to `recv`.
 
-        if header[:3] != b"LXR":
-            print("Invalid header received")
-            return
+        Raises:
+            ConnectionError: If the server closed the connection.
+        """
+        while not self._pending:
+            start = time.perf_counter()
+            self.reader.fill(self.sock)
+            self._recv_seconds.observe(time.perf_counter() - start)
+            self.received_at = time.time()
 
-        if header[3:4] != b"\x03":
-            print("Invalid protocol version")
-            return
+            self._pending.extend(self.reader.frames())
 
-        message_type = MessageType(struct.unpack("B", header[4:5])[0])
-        message_length = struct.unpack(">H", header[5:7])[0]
+        frame = self._pending.popleft()
+        self._frames_received[frame[0]].inc()
+        if self.capture:
+            self.capture.write(*frame)
 
-        if header[7:10] != b"\x00\x00\x00":
-            print("Invalid header padding")
-            return
+        return frame
 
-        message = self.sock.recv(message_length)
 
-        if len(message) != message_length:
-            print("Invalid message length")
-            return
+from glonax.message import (
+    Instance,
+    ModuleStatus,
+    ModuleStatusRecord,
+    Engine,
+    EngineRecord,
+    Gnss,
+    GnssRecord,
+)
+
 
-        return message_type, message
+class DecodeError(ValueError):
+    """A message payload could not be decoded."""
 
 
-from glonax.message import Instance, ModuleStatus, Engine, Gnss
+APPLICATION_TYPES = frozenset(
+    [
+        MessageType.STATUS,
+        MessageType.MOTION,
+        MessageType.VMS,
+        MessageType.GNSS,
+        MessageType.ENGINE,
+        MessageType.TARGET,
+        MessageType.CONTROL,
+        MessageType.ROTATOR,
+    ]
+)
 
 
-APPLICATION_TYPES = [
-    MessageType.STATUS,
-    MessageType.MOTION,
-    MessageType.VMS,
-    MessageType.GNSS,
-    MessageType.ENGINE,
-    MessageType.TARGET,
-    MessageType.CONTROL,
-    MessageType.ROTATOR,
-]
+# Controls that jump the queue of the control writer.
+CONTROL_PRIORITIES = {
+    Control.ControlType.MACHINE_SHUTDOWN: URGENT,
+    Control.ControlType.ENGINE_SHUTDOWN: URGENT,
+}
+
+# Setpoint controls, only the latest value is sent.
+COALESCED_CONTROLS = frozenset([Control.ControlType.ENGINE_REQUEST])
 
 
 class GlonaxClient:
@@ -241,7 +503,24 @@ class GlonaxClient:
         on_message: Callable[[Any, MessageType, bytes], None] | None = None,
         on_error: Callable[[Any, Any], None] | None = None,
         on_close: Callable[[Any, Any], None] | None = None,
+        on_rtt: Callable[[Any, float], None] | None = None,
+        reconnect: bool = True,
+        backoff: Backoff | None = None,
+        timeout: float | None = None,
+        control_rate: float = 20.0,
     ):
+        """
+        Connects to the Glonax server.
+
+        Args:
+            reconnect (bool): Reconnect when the connection fails, instead of
+                raising the error. This includes the initial connection.
+            backoff (Backoff | None): Delay policy between connection attempts.
+            timeout (float | None): Seconds without data after which the
+                connection is considered dead.
+            control_rate (float): Maximum setpoint controls per second, such
+                as engine requests.
+        """
         self.server_ip = address
         self.server_port = port
         self.user_agent = user_agent
@@ -251,22 +530,112 @@ class GlonaxClient:
         self.on_message = on_message
         self.on_error = on_error
         self.on_close = on_close
+        self.on_rtt = on_rtt
+
+        self.rtt = RttMonitor()
+        self._probing = False
+
+        # Probes are only sent once the handshake is done, so their echoes
+        # are never read as the ping or handshake reply
+        self._probe_lock = threading.Lock()
+        self._probe_ready = False
+
+        self.reconnect = reconnect
+        self.backoff = backoff or Backoff()
+
+        self.subscriptions = APPLICATION_TYPES
+
+        # Seconds from (re)connecting until the first message was dispatched
+        self.recovery_time: float | None = None
+        self._connected = False
+        self._connected_at: float | None = None
 
         self.conn = TcpConnection(
             address=address,
             port=port,
             on_connect=self._on_connect,
+            timeout=timeout,
+        )
+
+        self.writer = ControlWriter(
+            self._send_control,
+            CONTROL_PRIORITIES,
+            COALESCED_CONTROLS,
+            rate=control_rate,
         )
-        self.conn.connect()
+        self.writer.start()
+
+        if self.reconnect:
+            self._reconnect()
+        else:
+            self.conn.connect()
 
     def _on_connect(self):
+        self._pause_probes()
+
         latency = self.ping()
         logger.debug(f"Conection latency: {latency:.2f} seconds")
 
         self._handshake()
 
-        if self.on_connect:
-            self.on_connect(self)
+        if self.subscriptions != APPLICATION_TYPES:
+            self.subscribe(self.subscriptions)
+
+        with self._probe_lock:
+            self._probe_ready = True
+
+        self._connected_at = time.monotonic()
+
+        if self._connected:
+            if self.on_reconnect:
+                self.on_reconnect(self)
+        else:
+            self._connected = True
+            if self.on_connect:
+                self.on_connect(self)
+
+    def _reconnect(self):
+        """
+        Connects to the server, retrying with backoff until it succeeds.
+
+        The backoff is only reset once `listen` receives a frame, so a server
+        that accepts connections and drops them is not hammered.
+        """
+        while True:
+            try:
+                self.conn.connect()
+                break
+            except (OSError, struct.error, ValueError, IndexError) as e:
+                # A corrupted or short handshake reply is handled like a
+                # failed connect
+                self.conn.close()
+
+                delay = self.backoff.next()
+                logger.warning(f"Connection failed: {e}, retrying in {delay:.1f}s")
+
+                if self.on_error:
+                    self.on_error(self, e)
+
+                sleep(delay)
+
+    def start_capture(self, path: str):
+        """
+        Records every frame received from the server to a capture file.
+
+        The capture can be replayed with `glonax.capture.replay`.
+
+        Args:
+            path (str): The capture file, overwritten if it exists.
+        """
+        from glonax.capture import CaptureWriter
+
+        self.stop_capture()
+        self.conn.capture = CaptureWriter(path)
+
+    def stop_capture(self):
+        if self.conn.capture:
+            self.conn.capture.close()
+            self.conn.capture = None
 
     def ping(self) -> float:
         """
@@ -289,6 +658,43 @@ class GlonaxClient:
         elapsed_time = end_time - start_time
         return elapsed_time
 
+    def start_probes(self, interval: float = 1.0):
+        """
+        Sends echo probes every `interval` seconds from a background thread.
+
+        Responses are matched by `listen` without interrupting application
+        traffic; the statistics are kept in `rtt` and every measurement is
+        passed to `on_rtt`.
+        """
+        if self._probing:
+            return
+
+        self._probing = True
+
+        def probe():
+            while self._probing:
+                sleep(interval)
+                with self._probe_lock:
+                    if not self._probe_ready:
+                        continue
+
+                    echo = Echo(self.rtt.probe())
+                    try:
+                        self.conn.send(MessageType.ECHO, echo.to_bytes())
+                    except OSError:
+                        # Not connected, the listen loop handles reconnecting
+                        pass
+
+        threading.Thread(target=probe, name="rtt", daemon=True).start()
+
+    def stop_probes(self):
+        self._probing = False
+
+    def _pause_probes(self):
+        # Waits for a probe being sent, none follows until the handshake is done
+        with self._probe_lock:
+            self._probe_ready = False
+
     def _handshake(self):
         """
         Performs the handshake process with the Glonax server.
@@ -314,6 +720,27 @@ class GlonaxClient:
             )
             logger.debug(f"Instance serial number: {self.machine.serial_number}")
 
+    def _send_control(self, payload: bytes):
+        self.conn.send(MessageType.CONTROL, payload)
+
+    def control(self, type: Control.ControlType, value=None) -> Future:
+        """
+        Queues a control message for the control writer.
+
+        Shutdown controls are sent before anything else that is queued, and
+        for setpoints such as engine requests only the latest value is sent.
+
+        Returns:
+            Future: Completes once the control is sent, see `ControlWriter`.
+
+        Raises:
+            ConnectionError: If the client is not connected.
+        """
+        if self.conn.sock is None:
+            raise ConnectionError("Not connected to the Glonax server")
+
+        return self.writer.submit(type, Control(type, value).to_bytes())
+
     def horn(self, value: bool):
         """
         Sends a control message to activate the machine horn.
@@ -321,10 +748,7 @@ class GlonaxClient:
         Args:
             value (bool): The value to set the machine horn.
         """
-        self.conn.send(
-            MessageType.CONTROL,
-            Control(Control.ControlType.MACHINE_HORN, value).to_bytes(),
-        )
+        return self.control(Control.ControlType.MACHINE_HORN, value)
 
     def lights(self, value: bool):
         """
@@ -333,10 +757,7 @@ class GlonaxClient:
         Args:
             value (bool): The value to set the machine lights.
         """
-        self.conn.send(
-            MessageType.CONTROL,
-            Control(Control.ControlType.MACHINE_LIGHTS, value).to_bytes(),
-        )
+        return self.control(Control.ControlType.MACHINE_LIGHTS, value)
 
     def illumination(self, value: bool):
         """
@@ -345,29 +766,38 @@ class GlonaxClient:
         Args:
             value (bool): The value to set for the machine illumination. True to turn on the illumination, False to turn it off.
         """
-        self.conn.send(
-            MessageType.CONTROL,
-            Control(Control.ControlType.MACHINE_ILLUMINATION, value).to_bytes(),
-        )
+        return self.control(Control.ControlType.MACHINE_ILLUMINATION, value)
 
     def hydraulic_lock(self, value: bool):
-        self.conn.send(
-            MessageType.CONTROL,
-            Control(Control.ControlType.HYDRAULIC_LOCK, value).to_bytes(),
-        )
+        return self.control(Control.ControlType.HYDRAULIC_LOCK, value)
 
     def hydraulic_quick_disconnect(self, value: bool):
-        self.conn.send(
-            MessageType.CONTROL,
-            Control(Control.ControlType.HYDRAULIC_QUICK_DISCONNECT, value).to_bytes(),
-        )
+        return self.control(Control.ControlType.HYDRAULIC_QUICK_DISCONNECT, value)
 
     # TODO: Implementaton is invalid
     def engine_request(self, value: int):
-        self.conn.send(
-            MessageType.CONTROL,
-            Control(Control.ControlType.ENGINE_REQUEST, value).to_bytes(),
-        )
+        return self.control(Control.ControlType.ENGINE_REQUEST, value)
+
+    def engine_shutdown(self):
+        return self.control(Control.ControlType.ENGINE_SHUTDOWN)
+
+    def machine_shutdown(self):
+        return self.control(Control.ControlType.MACHINE_SHUTDOWN)
+
+    def subscribe(self, types):
+        """
+        Asks the server to only send the given application message types.
+
+        A request message is sent for every type. Messages of other types
+        that still arrive are dropped before they reach `on_message`.
+
+        Args:
+            types: The message types to receive.
+        """
+        self.subscriptions = frozenset(types)
+
+        for message_type in self.subscriptions:
+            self.conn.send(MessageType.REQUEST, Request(message_type).to_bytes())
 
     def listen(
         self, on_message: Callable[[Any, MessageType, bytes], None] | None = None
@@ -375,28 +805,120 @@ class GlonaxClient:
         if on_message:
             self.on_message = on_message
 
-        while True:
-            message_type, message = self.conn.recv()
+        subscriptions = getattr(self.on_message, "subscriptions", None)
 
-            if message_type in APPLICATION_TYPES:
+        while True:
+            try:
+                if subscriptions is not None:
+                    # Sent again by `_on_connect` if the link drops meanwhile
+                    types, subscriptions = subscriptions, None
+                    self.subscribe(types)
+
+                message_type, message = self.conn.recv()
+            except OSError as e:
+                logger.warning(f"Connection lost: {e}")
+
+                self._pause_probes()
+                self.conn.close()
+                if self.on_close:
+                    self.on_close(self, e)
+
+                if not self.reconnect:
+                    raise
+
+                sleep(self.backoff.next())
+                self._reconnect()
+                continue
+
+            if self.backoff.attempts:
+                self.backoff.reset()
+
+            if message_type == MessageType.ECHO:
+                rtt = self.rtt.on_echo(message)
+                if rtt is not None and self.on_rtt:
+                    self.on_rtt(self, rtt)
+                continue
+
+            if message_type in self.subscriptions:
                 if self.on_message:
-                    self.on_message(self, message_type, message)
+                    try:
+                        self.on_message(self, message_type, message)
+                    except DecodeError as e:
+                        logger.warning(
+                            "Invalid %s message: %s",
+                            message_type,
+                            e,
+                            extra={"topic": "decode"},
+                        )
+
+                        if self.on_error:
+                            self.on_error(self, e)
+
+                if self._connected_at is not None:
+                    self.recovery_time = time.monotonic() - self._connected_at
+                    self._connected_at = None
+
+                    logger.debug(f"First message after {self.recovery_time:.3f}s")
+
+
+# Handler name, model and record for every message type a service can decode.
+SERVICE_HANDLERS = {
+    MessageType.STATUS: ("on_status", ModuleStatus, ModuleStatusRecord),
+    MessageType.GNSS: ("on_gnss", Gnss, GnssRecord),
+    MessageType.ENGINE: ("on_engine", Engine, EngineRecord),
+}
 
 
 # TODO: Rename to ServiceBase, move to a separate file
 class GlonaxServiceBase:
+    # When set, messages are decoded into unvalidated records instead of
+    # pydantic models. Call `to_model()` on a record to get the model. Can be
+    # set on the class or on an instance.
+    trusted = False
+
+    _dispatch = {}
+
+    def __init_subclass__(cls, **kwargs):
+        """
+        Builds the dispatch table from the handlers the subclass overrides.
+        """
+        super().__init_subclass__(**kwargs)
+
+        cls._dispatch = {}
+        for message_type, (name, model, record) in SERVICE_HANDLERS.items():
+            handler = getattr(cls, name)
+            if handler is getattr(GlonaxServiceBase, name):
+                continue
+
+            cls._dispatch[message_type] = (
+                model.from_bytes,
+                record.from_bytes,
+                handler,
+                DECODE_SECONDS.labels(message_type.name.lower()),
+                HANDLER_SECONDS.labels(message_type.name.lower()),
+            )
+
+    @property
+    def subscriptions(self) -> frozenset[MessageType]:
+        """The message types this service handles."""
+        return frozenset(self._dispatch)
+
     def __call__(self, client, message_type, message):
-        if message_type == MessageType.STATUS:
-            status = ModuleStatus.from_bytes(message)
-            self.on_status(client, status)
-        elif message_type == MessageType.VMS:
-            pass
-        elif message_type == MessageType.ENGINE:
-            engine = Engine.from_bytes(message)
-            self.on_engine(client, engine)
-        elif message_type == MessageType.GNSS:
-            gnss = Gnss.from_bytes(message)
-            self.on_gnss(client, gnss)
+        entry = self._dispatch.get(message_type)
+        if entry is not None:
+            model, record, handler, decode_seconds, handler_seconds = entry
+
+            start = time.perf_counter()
+            try:
+                message = record(message) if self.trusted else model(message)
+            except (struct.error, ValueError) as e:
+                # Corrupted frames can pass the header checks
+                raise DecodeError(e) from e
+            decoded = time.perf_counter()
+            handler(self, client, message)
+
+            decode_seconds.observe(decoded - start)
+            handler_seconds.observe(time.perf_counter() - decoded)
 
     @abstractmethod
     def on_status(self, client: GlonaxClient, status: ModuleStatus):
@@ -5,6 +5,15 @@ from uuid import UUID
 from pydantic import BaseModel, Field
 
 
+UINT16 = struct.Struct(">H")
+MODULE_STATE = struct.Struct("BB")
+ENGINE = struct.Struct(">BBH")
+GNSS = struct.Struct("=fffffB")
+
+# Highest engine speed in RPM, reported or requested.
+ENGINE_RPM_MAX = 8000
+
+
 class Instance(BaseModel):
     id: UUID
     model: str
@@ -13,19 +22,20 @@ class Instance(BaseModel):
     serial_number: str
 
     def from_bytes(data):
-        id = UUID(bytes=data[:16])
+        id = UUID(bytes=bytes(data[:16]))
         machine_type = data[16]
         version = struct.unpack("BBB", data[17:20])
 
         model_length = struct.unpack(">H", data[20:22])[0]
-        model = data[22 : 22 + model_length].decode("utf-8")
+        model = str(data[22 : 22 + model_length], "utf-8")
 
         serial_number_length = struct.unpack(
             ">H", data[22 + model_length : 24 + model_length]
         )[0]
-        serial_number = data[
-            24 + model_length : 24 + model_length + serial_number_length
-        ].decode("utf-8")
+        serial_number = str(
+            data[24 + model_length : 24 + model_length + serial_number_length],
+            "utf-8",
+        )
 
         return Instance(
             id=id,
@@ -53,19 +63,19 @@ class ModuleStatus(BaseModel):
     error_code: int
 
     def from_bytes(data):
-        name_length = struct.unpack(">H", data[0:2])[0]
-        name = data[2 : 2 + name_length].decode("utf-8")
+        name_length = UINT16.unpack_from(data)[0]
+        name = str(data[2 : 2 + name_length], "utf-8")
 
-        state = data[2 + name_length]
-        error_code = data[3 + name_length]
+        state, error_code = MODULE_STATE.unpack_from(data, 2 + name_length)
 
         return ModuleStatus(name=name, state=state, error_code=error_code)
 
     def to_bytes(self):
+        name = self.name.encode("utf-8")
         return (
-            struct.pack(">H", len(self.name))
-            + self.name.encode("utf-8")
-            + struct.pack("BB", self.state, self.error_code)
+            UINT16.pack(len(name))
+            + name
+            + MODULE_STATE.pack(self.state, self.error_code)
         )
 
 
@@ -129,19 +139,15 @@ class ModuleStatus(BaseModel):
 class Engine(BaseModel):
     driver_demand: int
     actual_engine: int
-    rpm: int = Field(default=0, ge=0, le=8000)
+    rpm: int = Field(default=0, ge=0, le=ENGINE_RPM_MAX)
 
     def from_bytes(data):
-        driver_demand = data[0]
-        actual_engine = data[1]
-        rpm = struct.unpack(">H", data[2:4])[0]
+        driver_demand, actual_engine, rpm = ENGINE.unpack_from(data)
 
         return Engine(driver_demand=driver_demand, actual_engine=actual_engine, rpm=rpm)
 
     def to_bytes(self):
-        return bytes([self.driver_demand, self.actual_engine]) + struct.pack(
-            ">H", self.rpm
-        )
+        return ENGINE.pack(self.driver_demand, self.actual_engine, self.rpm)
 
 
 class Gnss(BaseModel):
@@ -152,21 +158,129 @@ class Gnss(BaseModel):
     satellites: int
 
     def from_bytes(data):
-        location = struct.unpack("ff", data[:8])
-        altitude, speed, heading = struct.unpack("fff", data[8:20])
-        satellites = struct.unpack("B", data[20:21])
+        latitude, longitude, altitude, speed, heading, satellites = GNSS.unpack_from(
+            data
+        )
 
         return Gnss(
-            location=location,
+            location=(latitude, longitude),
             altitude=altitude,
             speed=speed,
             heading=heading,
-            satellites=satellites[0],
+            satellites=satellites,
         )
 
     def to_bytes(self):
+        return GNSS.pack(
+            *self.location, self.altitude, self.speed, self.heading, self.satellites
+        )
+
+
+class Record:
+    """
+    Lightweight, unvalidated counterpart of a message model.
+
+    Records are decoded straight from trusted frames with precompiled struct
+    layouts and skip pydantic entirely. They compare and dump like the model,
+    and `to_model` builds the validated model only when it is needed.
+    """
+
+    __slots__ = ()
+
+    model: type[BaseModel]
+
+    def to_model(self):
+        return self.model(**self.model_dump())
+
+    def model_dump(self) -> dict:
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    def __eq__(self, __value: object) -> bool:
+        if type(__value) is not type(self):
+            return NotImplemented
+        return all(
+            getattr(self, field) == getattr(__value, field) for field in self.__slots__
+        )
+
+    def __str__(self):
+        return " ".join(
+            f"{field}={getattr(self, field)!r}" for field in self.__slots__
+        )
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self})"
+
+
+class ModuleStatusRecord(Record):
+    __slots__ = ("name", "state", "error_code")
+
+    model = ModuleStatus
+
+    def __init__(self, name: str, state: int, error_code: int):
+        self.name = name
+        self.state = state
+        self.error_code = error_code
+
+    def from_bytes(data):
+        name_length = UINT16.unpack_from(data)[0]
+        name = str(data[2 : 2 + name_length], "utf-8")
+
+        state, error_code = MODULE_STATE.unpack_from(data, 2 + name_length)
+
+        return ModuleStatusRecord(name, state, error_code)
+
+    def to_bytes(self):
+        name = self.name.encode("utf-8")
         return (
-            struct.pack("ff", *self.location)
-            + struct.pack("fff", self.altitude, self.speed, self.heading)
-            + struct.pack("B", self.satellites)
+            UINT16.pack(len(name))
+            + name
+            + MODULE_STATE.pack(self.state, self.error_code)
+        )
+
+
+class EngineRecord(Record):
+    __slots__ = ("driver_demand", "actual_engine", "rpm")
+
+    model = Engine
+
+    def __init__(self, driver_demand: int, actual_engine: int, rpm: int):
+        self.driver_demand = driver_demand
+        self.actual_engine = actual_engine
+        self.rpm = rpm
+
+    def from_bytes(data):
+        return EngineRecord(*ENGINE.unpack_from(data))
+
+    def to_bytes(self):
+        return ENGINE.pack(self.driver_demand, self.actual_engine, self.rpm)
+
+
+class GnssRecord(Record):
+    __slots__ = ("location", "altitude", "speed", "heading", "satellites")
+
+    model = Gnss
+
+    def __init__(
+        self,
+        location: tuple[float, float],
+        altitude: float,
+        speed: float,
+        heading: float,
+        satellites: int,
+    ):
+        self.location = location
+        self.altitude = altitude
+        self.speed = speed
+        self.heading = heading
+        self.satellites = satellites
+
+    def from_bytes(data):
+        latitude, longitude, altitude, speed, heading, satellites = GNSS.unpack_from(
+            data
+        )
+        return GnssRecord((latitude, longitude), altitude, speed, heading, satellites)
+
+    def to_bytes(self):
+        return GNSS.pack(
+            *self.location, self.altitude, self.speed, self.heading, self.satellites
         )
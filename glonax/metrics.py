@@ -0,0 +1,323 @@
+import bisect
+import threading
+import time
+import logging
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Hashable, Iterable
+
+
+logger = logging.getLogger(__name__)
+
+# Latency buckets in seconds, from 10 microseconds up to 5 seconds.
+LATENCY_BUCKETS = (
+    0.00001,
+    0.000025,
+    0.00005,
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    5.0,
+)
+
+
+class Metric:
+    """
+    Base of a metric family with optional labels.
+
+    Children are created once per label combination with `labels` and
+    should be kept by the caller on hot paths. Updates are not locked; an
+    occasional lost update under contention is the price for keeping the
+    overhead low enough to leave instrumentation on.
+    """
+
+    type = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._child())
+        return child
+
+    def _child(self):
+        raise NotImplementedError
+
+    def _label_string(self, values: tuple, extra: str = "") -> str:
+        pairs = [
+            f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, values)
+        ]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def snapshot(self) -> dict[tuple, Any]:
+        """Returns the state of every child as plain, picklable values."""
+        return {
+            values: self._state(child) for values, child in list(self._children.items())
+        }
+
+    def render(self, others: Iterable[dict[tuple, Any]] = ()) -> list[str]:
+        """
+        Renders the metric, adding up the snapshots in `others`, such as those
+        of other processes, with the local children.
+        """
+        states = self.snapshot()
+        for snapshot in others:
+            for values, state in snapshot.items():
+                if values in states:
+                    state = self._merge(states[values], state)
+                states[values] = state
+
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        for values, state in states.items():
+            lines.extend(self._render_child(values, state))
+        return lines
+
+
+def _escape(value) -> str:
+    """Escapes a label value as the text exposition format requires."""
+    return (
+        str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    )
+
+
+class CounterValue:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def _child(self):
+        return CounterValue()
+
+    def inc(self, amount: float = 1):
+        self.labels().inc(amount)
+
+    def _state(self, child):
+        return child.value
+
+    def _merge(self, state, other):
+        return state + other
+
+    def _render_child(self, values, state):
+        return [f"{self.name}{self._label_string(values)} {state}"]
+
+
+class GaugeValue(CounterValue):
+    __slots__ = ()
+
+    def set(self, value: float):
+        self.value = value
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def _child(self):
+        return GaugeValue()
+
+    def set(self, value: float):
+        self.labels().set(value)
+
+
+class HistogramValue:
+    """Fixed bucket histogram, observing is a bisect and two additions."""
+
+    __slots__ = ("buckets", "counts", "sum")
+
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def time(self) -> "Timer":
+        return Timer(self)
+
+
+class Timer:
+    """Context manager observing the elapsed time of a block."""
+
+    __slots__ = ("histogram", "start")
+
+    def __init__(self, histogram: HistogramValue):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.observe(time.perf_counter() - self.start)
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _child(self):
+        return HistogramValue(self.buckets)
+
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+    def _state(self, child):
+        return list(child.counts), child.sum
+
+    def _merge(self, state, other):
+        counts, total = state
+        other_counts, other_total = other
+        return [a + b for a, b in zip(counts, other_counts)], total + other_total
+
+    def _render_child(self, values, state):
+        counts, total = state
+
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, counts):
+            cumulative += count
+            labels = self._label_string(values, f'le="{bound}"')
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+
+        cumulative += counts[-1]
+        labels = self._label_string(values, 'le="+Inf"')
+        lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        lines.append(f"{self.name}_sum{self._label_string(values)} {total}")
+        lines.append(f"{self.name}_count{self._label_string(values)} {cumulative}")
+        return lines
+
+
+class Registry:
+    """
+    Metrics of this process, optionally combined with snapshots reported by
+    other processes, such as gateway workers.
+    """
+
+    def __init__(self):
+        self._metrics: dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+        # Latest snapshot per remote source
+        self._remote: dict[Hashable, dict[str, dict[tuple, Any]]] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, help: str, labelnames=()) -> Counter:
+        return self.register(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames=()) -> Gauge:
+        return self.register(Gauge(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames=(), **kwargs) -> Histogram:
+        return self.register(Histogram(name, help, labelnames, **kwargs))
+
+    def snapshot(self) -> dict[str, dict[tuple, Any]]:
+        """Returns the state of all metrics, to be merged by another registry."""
+        return {name: metric.snapshot() for name, metric in list(self._metrics.items())}
+
+    def update_remote(self, source: Hashable, snapshot: dict[str, dict[tuple, Any]]):
+        """
+        Replaces the snapshot reported by `source`. Its values are added to
+        the local ones when rendering. Metrics unknown here are ignored.
+        """
+        with self._lock:
+            self._remote[source] = snapshot
+
+    def remove_remote(self, source: Hashable):
+        with self._lock:
+            self._remote.pop(source, None)
+
+    def render(self) -> str:
+        """Returns all metrics in the Prometheus text exposition format."""
+        with self._lock:
+            remote = list(self._remote.values())
+
+        lines = []
+        for name, metric in list(self._metrics.items()):
+            others = [snapshot[name] for snapshot in remote if name in snapshot]
+            lines.extend(metric.render(others))
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    registry = REGISTRY
+
+    def do_GET(self):
+        if self.path not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+
+        body = self.registry.render().encode("utf-8")
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(
+    port: int = 9108, address: str = "127.0.0.1", registry: Registry = REGISTRY
+) -> ThreadingHTTPServer:
+    """
+    Serves the metrics over HTTP from a background thread.
+
+    Returns:
+        ThreadingHTTPServer: The server, call `shutdown` to stop it.
+    """
+    handler = type("Handler", (MetricsHandler,), {"registry": registry})
+
+    server = ThreadingHTTPServer((address, port), handler)
+    server.daemon_threads = True
+
+    thread = threading.Thread(target=server.serve_forever, name="metrics", daemon=True)
+    thread.start()
+
+    logger.debug(f"Serving metrics on {address}:{port}")
+
+    return server
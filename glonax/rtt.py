@@ -0,0 +1,97 @@
+import collections
+import struct
+import time
+
+from glonax import metrics
+
+
+# Sequence number carried in the payload of an echo probe.
+ECHO_SEQUENCE = struct.Struct(">I")
+
+RTT_SECONDS = metrics.REGISTRY.histogram(
+    "glonax_rtt_seconds", "Round trip time of echo probes"
+)
+JITTER_SECONDS = metrics.REGISTRY.gauge(
+    "glonax_rtt_jitter_seconds", "Smoothed round trip time jitter"
+)
+PROBES_LOST = metrics.REGISTRY.counter(
+    "glonax_rtt_probes_lost_total", "Echo probes without a timely response"
+)
+
+
+class RttMonitor:
+    """
+    Rolling round trip time statistics from sequenced echo probes.
+
+    Every probe carries a sequence number, so responses can be matched while
+    application traffic keeps flowing. Jitter is smoothed like in RFC 3550.
+    Probes without a response within `timeout` seconds count as lost.
+    """
+
+    def __init__(self, window: int = 64, timeout: float = 5.0):
+        self.timeout = timeout
+
+        self.samples: collections.deque[float] = collections.deque(maxlen=window)
+        self.last: float | None = None
+        self.jitter = 0.0
+        self.lost = 0
+
+        self._sequence = 0
+        self._outstanding: dict[int, float] = {}
+
+    def probe(self) -> bytes:
+        """Registers a new probe and returns the echo payload to send."""
+        now = time.monotonic()
+
+        for sequence, sent_at in list(self._outstanding.items()):
+            if now - sent_at > self.timeout:
+                # The listen loop may have matched it in the meantime
+                if self._outstanding.pop(sequence, None) is not None:
+                    self.lost += 1
+                    PROBES_LOST.inc()
+
+        self._sequence = (self._sequence + 1) & 0xFFFFFFFF
+        self._outstanding[self._sequence] = now
+        return ECHO_SEQUENCE.pack(self._sequence)
+
+    def on_echo(self, data: bytes) -> float | None:
+        """
+        Matches an echo response to its probe.
+
+        Returns:
+            float | None: The round trip time in seconds, or None if the echo
+            does not belong to a probe.
+        """
+        if len(data) != ECHO_SEQUENCE.size:
+            return None
+
+        sent_at = self._outstanding.pop(ECHO_SEQUENCE.unpack(data)[0], None)
+        if sent_at is None:
+            return None
+
+        rtt = time.monotonic() - sent_at
+
+        if self.last is not None:
+            self.jitter += (abs(rtt - self.last) - self.jitter) / 16
+        self.last = rtt
+        self.samples.append(rtt)
+
+        RTT_SECONDS.observe(rtt)
+        JITTER_SECONDS.set(self.jitter)
+
+        return rtt
+
+    def stats(self) -> dict:
+        samples = list(self.samples)
+        if not samples:
+            return {"count": 0, "lost": self.lost}
+
+        return {
+            "count": len(samples),
+            "last": self.last,
+            "min": min(samples),
+            "max": max(samples),
+            "mean": sum(samples) / len(samples),
+            "jitter": self.jitter,
+            "lost": self.lost,
+        }
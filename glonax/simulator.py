@@ -0,0 +1,236 @@
+import math
+import random
+import select
+import socketserver
+import time
+import uuid
+import logging
+
+from glonax.client import (
+    HEADER,
+    HEADER_PADDING,
+    PROTOCOL_MAGIC,
+    FrameReader,
+    MachineType,
+    MessageType,
+    Request,
+)
+from glonax.message import ENGINE, GNSS, Instance, ModuleStatusRecord
+
+
+logger = logging.getLogger(__name__)
+
+# Interval at which streamed messages are generated and sent, in seconds.
+TICK = 0.01
+
+MODULES = ["encoder", "engine", "gnss", "hydraulic", "vehicle"]
+
+
+def frame(message_type: MessageType, payload: bytes) -> bytes:
+    header = HEADER.pack(
+        PROTOCOL_MAGIC, message_type.value, len(payload), HEADER_PADDING
+    )
+    return header + payload
+
+
+class Faults:
+    """
+    Faults injected into the streamed messages.
+
+    Args:
+        truncate (float): Probability that a frame is cut short.
+        bad_magic (float): Probability that a frame has an invalid magic.
+        stall (float): Probability per tick that the stream stalls.
+        stall_duration (float): Seconds a stall lasts.
+    """
+
+    def __init__(
+        self,
+        truncate: float = 0.0,
+        bad_magic: float = 0.0,
+        stall: float = 0.0,
+        stall_duration: float = 1.0,
+    ):
+        self.truncate = truncate
+        self.bad_magic = bad_magic
+        self.stall = stall
+        self.stall_duration = stall_duration
+
+    def apply(self, data: bytes) -> bytes:
+        if self.truncate and random.random() < self.truncate:
+            return data[: random.randrange(1, len(data))]
+        if self.bad_magic and random.random() < self.bad_magic:
+            return b"LXQ" + data[3:]
+        return data
+
+
+class GlonaxSimulator(socketserver.ThreadingTCPServer):
+    """
+    Stand-in Glonax server speaking the LXR v3 protocol.
+
+    Answers echo and session messages and, once a session is started,
+    streams status, engine and GNSS messages to every client at the
+    configured rates in messages per second. Clients can limit the stream
+    with request messages.
+    """
+
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: tuple[str, int] = ("127.0.0.1", 30051),
+        rates: dict[MessageType, float] | None = None,
+        faults: Faults | None = None,
+        instance: Instance | None = None,
+    ):
+        self.rates = rates or {
+            MessageType.STATUS: 1,
+            MessageType.ENGINE: 10,
+            MessageType.GNSS: 10,
+        }
+        self.faults = faults or Faults()
+        self.instance = instance or Instance(
+            id=uuid.uuid4(),
+            model="Simulator",
+            machine_type=MachineType.EXCAVATOR.value,
+            version=(0, 1, 0),
+            serial_number="SIM0000",
+        )
+
+        super().__init__(address, SimulatorHandler)
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+
+class SimulatorHandler(socketserver.BaseRequestHandler):
+    server: GlonaxSimulator
+
+    def setup(self):
+        self.reader = FrameReader()
+        self.streaming = False
+        self.subscriptions: set[MessageType] = set()
+        self.sequence = 0
+        self.backlog = {message_type: 0.0 for message_type in self.server.rates}
+
+    def handle(self):
+        logger.debug(f"Client connected from {self.client_address}")
+
+        next_tick = time.monotonic()
+        while True:
+            timeout = max(0.0, next_tick - time.monotonic())
+            readable, _, _ = select.select([self.request], [], [], timeout)
+
+            try:
+                if readable:
+                    self.reader.fill(self.request)
+                    for message_type, message in self.reader.frames():
+                        self.on_message(message_type, message)
+
+                if time.monotonic() >= next_tick:
+                    next_tick += TICK
+                    if self.streaming:
+                        self.stream()
+            except (ConnectionError, OSError):
+                break
+
+        logger.debug(f"Client disconnected from {self.client_address}")
+
+    def on_message(self, message_type: MessageType, message: memoryview):
+        if message_type == MessageType.ECHO:
+            self.request.sendall(frame(MessageType.ECHO, bytes(message)))
+        elif message_type == MessageType.SESSION:
+            self.request.sendall(
+                frame(MessageType.INSTANCE, self.server.instance.to_bytes())
+            )
+            self.streaming = True
+        elif message_type == MessageType.REQUEST:
+            try:
+                request = Request.from_bytes(message)
+            except (ValueError, IndexError) as e:
+                # Unknown or truncated request, keep the session going
+                logger.warning(f"Ignored invalid request: {e}")
+                return
+            self.subscriptions.add(request.type)
+
+    def stream(self):
+        faults = self.server.faults
+
+        if faults.stall and random.random() < faults.stall:
+            time.sleep(faults.stall_duration)
+
+        data = bytearray()
+        for message_type, rate in self.server.rates.items():
+            if self.subscriptions and message_type not in self.subscriptions:
+                continue
+
+            self.backlog[message_type] += rate * TICK
+            count = int(self.backlog[message_type])
+            self.backlog[message_type] -= count
+
+            for _ in range(count):
+                payload = self.payload(message_type)
+                data += faults.apply(frame(message_type, payload))
+
+        if data:
+            self.request.sendall(data)
+
+    def payload(self, message_type: MessageType) -> bytes:
+        self.sequence += 1
+        t = self.sequence * 0.001
+
+        if message_type == MessageType.ENGINE:
+            rpm = 1200 + round(400 * math.sin(t))
+            return ENGINE.pack(50, 48, rpm)
+        elif message_type == MessageType.GNSS:
+            return GNSS.pack(
+                52.0 + 0.0001 * math.sin(t),
+                5.0 + 0.0001 * math.cos(t),
+                12.0,
+                1.5,
+                (t * 10) % 360,
+                12,
+            )
+        elif message_type == MessageType.STATUS:
+            name = MODULES[self.sequence % len(MODULES)]
+            return ModuleStatusRecord(name, 1, 0).to_bytes()
+
+        return b""
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Glonax server simulator")
+    parser.add_argument("--address", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=30051)
+    parser.add_argument("--status", type=float, default=1, help="messages/s")
+    parser.add_argument("--engine", type=float, default=10, help="messages/s")
+    parser.add_argument("--gnss", type=float, default=10, help="messages/s")
+    parser.add_argument("--truncate", type=float, default=0, help="probability")
+    parser.add_argument("--bad-magic", type=float, default=0, help="probability")
+    parser.add_argument("--stall", type=float, default=0, help="probability per tick")
+    parser.add_argument("--stall-duration", type=float, default=1, help="seconds")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.DEBUG)
+
+    simulator = GlonaxSimulator(
+        (args.address, args.port),
+        rates={
+            MessageType.STATUS: args.status,
+            MessageType.ENGINE: args.engine,
+            MessageType.GNSS: args.gnss,
+        },
+        faults=Faults(
+            truncate=args.truncate,
+            bad_magic=args.bad_magic,
+            stall=args.stall,
+            stall_duration=args.stall_duration,
+        ),
+    )
+
+    logger.info(f"Simulator listening on {args.address}:{simulator.port}")
+    simulator.serve_forever()
@@ -0,0 +1,331 @@
+import os
+import shutil
+import threading
+import time
+import logging
+
+import numpy as np
+
+from glonax.client import GlonaxServiceBase
+
+
+logger = logging.getLogger(__name__)
+
+# Column holding the Unix time of every row.
+TIME_FIELD = "time"
+
+ENGINE_FIELDS = {
+    "driver_demand": "u1",
+    "actual_engine": "u1",
+    "rpm": "u2",
+}
+
+GNSS_FIELDS = {
+    "latitude": "f4",
+    "longitude": "f4",
+    "altitude": "f4",
+    "speed": "f4",
+    "heading": "f4",
+    "satellites": "u1",
+}
+
+AGGREGATES = ("mean", "min", "max")
+
+
+class Segment:
+    """
+    Time partition of a series, one memory mapped .npy file per field.
+
+    Rows are only appended. The time column is zero filled when created,
+    so the number of rows written can be recovered after a restart.
+    """
+
+    def __init__(self, path: str, fields: dict[str, str], rows: int):
+        self.path = path
+
+        create = not os.path.exists(path)
+        if create:
+            os.makedirs(path)
+
+        self.columns: dict[str, np.memmap] = {}
+        for field, dtype in {TIME_FIELD: "f8", **fields}.items():
+            filename = os.path.join(path, f"{field}.npy")
+            if create:
+                column = np.lib.format.open_memmap(
+                    filename, mode="w+", dtype=dtype, shape=(rows,)
+                )
+            else:
+                column = np.load(filename, mmap_mode="r+")
+            self.columns[field] = column
+
+        self.time = self.columns[TIME_FIELD]
+        self.rows = len(self.time)
+        self._values = [self.columns[field] for field in fields]
+
+        empty = np.flatnonzero(self.time == 0)
+        self.count = int(empty[0]) if len(empty) else self.rows
+
+    @property
+    def start(self) -> float:
+        return float(self.time[0]) if self.count else 0.0
+
+    @property
+    def end(self) -> float:
+        return float(self.time[self.count - 1]) if self.count else 0.0
+
+    def full(self) -> bool:
+        return self.count == self.rows
+
+    def append(self, timestamp: float, values: tuple):
+        index = self.count
+        for column, value in zip(self._values, values):
+            column[index] = value
+
+        # Write the time last, a row only counts once it is complete
+        self.time[index] = timestamp
+        self.count += 1
+
+    def slice(self, start: float, end: float) -> slice:
+        times = self.time[: self.count]
+        return slice(
+            int(np.searchsorted(times, start, "left")),
+            int(np.searchsorted(times, end, "right")),
+        )
+
+    def flush(self):
+        for column in self.columns.values():
+            column.flush()
+
+    def remove(self):
+        self.columns.clear()
+        self._values.clear()
+        self.time = None
+        shutil.rmtree(self.path)
+
+
+class Series:
+    """
+    Append-only columnar history of one stream.
+
+    Rows are split into segments of at most `partition` seconds and
+    `segment_rows` rows. Segments whose newest row is older than
+    `retention` seconds are removed, as are the oldest segments beyond
+    `max_segments`.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        fields: dict[str, str],
+        partition: float = 3600.0,
+        segment_rows: int = 65536,
+        retention: float = 7 * 86400.0,
+        max_segments: int = 256,
+    ):
+        self.path = path
+        self.fields = fields
+        self.partition = partition
+        self.segment_rows = segment_rows
+        self.retention = retention
+        self.max_segments = max_segments
+
+        self._lock = threading.Lock()
+
+        os.makedirs(path, exist_ok=True)
+
+        self._segments: list[Segment] = []
+        for name in sorted(os.listdir(path)):
+            segment = Segment(os.path.join(path, name), fields, segment_rows)
+            if segment.count:
+                self._segments.append(segment)
+            else:
+                segment.remove()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(segment.count for segment in self._segments)
+
+    def append(self, values: tuple, timestamp: float | None = None):
+        """
+        Appends a row.
+
+        Args:
+            values (tuple): One value per field, in the order of `fields`.
+            timestamp (float | None): Unix time of the row. Rows must be in
+                time order; an older timestamp is moved up to the newest.
+        """
+        if timestamp is None:
+            timestamp = time.time()
+
+        with self._lock:
+            segment = self._segments[-1] if self._segments else None
+            if segment is not None:
+                timestamp = max(timestamp, segment.end)
+
+            if (
+                segment is None
+                or segment.full()
+                or timestamp - segment.start >= self.partition
+            ):
+                segment = self._roll(timestamp)
+
+            segment.append(timestamp, values)
+
+    def _roll(self, timestamp: float) -> Segment:
+        if self._segments:
+            self._segments[-1].flush()
+
+        name = f"{round(timestamp * 1e9):016x}"
+        segment = Segment(
+            os.path.join(self.path, name), self.fields, self.segment_rows
+        )
+        self._segments.append(segment)
+
+        expired = timestamp - self.retention
+        while len(self._segments) > 1 and (
+            len(self._segments) > self.max_segments
+            or self._segments[0].end < expired
+        ):
+            removed = self._segments.pop(0)
+            removed.remove()
+            logger.debug(f"Removed segment {os.path.basename(removed.path)}")
+
+        return segment
+
+    def range(
+        self, start: float, end: float | None = None, fields: list[str] | None = None
+    ) -> dict[str, np.ndarray]:
+        """
+        Returns the rows with a time in [start, end].
+
+        Returns:
+            dict[str, np.ndarray]: The time column and the requested fields.
+        """
+        if end is None:
+            end = time.time()
+        names = [TIME_FIELD, *(fields or self.fields)]
+
+        parts = {name: [] for name in names}
+        with self._lock:
+            for segment in self._segments:
+                if not segment.count or segment.end < start or segment.start > end:
+                    continue
+
+                rows = segment.slice(start, end)
+                for name in names:
+                    parts[name].append(np.array(segment.columns[name][rows]))
+
+        dtypes = {TIME_FIELD: "f8", **self.fields}
+        return {
+            name: np.concatenate(chunks) if chunks else np.empty(0, dtypes[name])
+            for name, chunks in parts.items()
+        }
+
+    def last(self, seconds: float, fields: list[str] | None = None):
+        """Returns the rows of the last `seconds` seconds."""
+        now = time.time()
+        return self.range(now - seconds, now, fields)
+
+    def downsample(
+        self,
+        start: float,
+        end: float | None,
+        bucket: float,
+        fields: list[str] | None = None,
+        how: str = "mean",
+    ) -> dict[str, np.ndarray]:
+        """
+        Aggregates the rows in [start, end] per `bucket` seconds.
+
+        Buckets without rows are left out.
+
+        Args:
+            how (str): One of "mean", "min" or "max".
+
+        Returns:
+            dict[str, np.ndarray]: The start time of every bucket, the number
+            of rows in it and the aggregated fields.
+        """
+        if how not in AGGREGATES:
+            raise ValueError(f"Unknown aggregate {how}, expected one of {AGGREGATES}")
+
+        rows = self.range(start, end, fields)
+        times = rows.pop(TIME_FIELD)
+        if not len(times):
+            return {TIME_FIELD: times, "count": np.empty(0, dtype="i8"), **rows}
+
+        buckets = np.floor((times - start) / bucket).astype("i8")
+        offsets = np.flatnonzero(np.diff(buckets, prepend=-1))
+        counts = np.diff(offsets, append=len(times))
+
+        result = {
+            TIME_FIELD: start + buckets[offsets] * bucket,
+            "count": counts,
+        }
+        for name, column in rows.items():
+            if how == "mean":
+                values = np.add.reduceat(column.astype("f8"), offsets) / counts
+            elif how == "min":
+                values = np.minimum.reduceat(column, offsets)
+            else:
+                values = np.maximum.reduceat(column, offsets)
+            result[name] = values
+
+        return result
+
+    def flush(self):
+        with self._lock:
+            if self._segments:
+                self._segments[-1].flush()
+
+
+class TimeSeriesStore:
+    """
+    On-disk history of the engine and GNSS streams.
+
+    Every stream is a `Series` in its own directory below `path`. The
+    keyword arguments are passed to every series.
+    """
+
+    def __init__(self, path: str, **kwargs):
+        self.path = path
+
+        self.engine = Series(os.path.join(path, "engine"), ENGINE_FIELDS, **kwargs)
+        self.gnss = Series(os.path.join(path, "gnss"), GNSS_FIELDS, **kwargs)
+
+    def append_engine(self, engine, timestamp: float | None = None):
+        self.engine.append(
+            (engine.driver_demand, engine.actual_engine, engine.rpm), timestamp
+        )
+
+    def append_gnss(self, gnss, timestamp: float | None = None):
+        self.gnss.append(
+            (
+                gnss.location[0],
+                gnss.location[1],
+                gnss.altitude,
+                gnss.speed,
+                gnss.heading,
+                gnss.satellites,
+            ),
+            timestamp,
+        )
+
+    def flush(self):
+        self.engine.flush()
+        self.gnss.flush()
+
+
+class Recorder(GlonaxServiceBase):
+    """Service writing the engine and GNSS streams to a `TimeSeriesStore`."""
+
+    trusted = True
+
+    def __init__(self, store: TimeSeriesStore):
+        self.store = store
+
+    def on_engine(self, client, engine):
+        self.store.append_engine(engine)
+
+    def on_gnss(self, client, gnss):
+        self.store.append_gnss(gnss)
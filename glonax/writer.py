@@ -0,0 +1,184 @@
+import collections
+import threading
+from concurrent.futures import Future
+import time
+import logging
+from typing import Any, Callable, Hashable
+
+from glonax import metrics
+
+
+logger = logging.getLogger(__name__)
+
+# Lanes in the order they are drained.
+URGENT = 0
+NORMAL = 1
+
+QUEUE_SECONDS = metrics.REGISTRY.histogram(
+    "glonax_control_queue_seconds", "Time a control waited for the writer", ("lane",)
+)
+COALESCED = metrics.REGISTRY.counter(
+    "glonax_control_coalesced_total", "Setpoints replaced before they were sent"
+)
+FAILED = metrics.REGISTRY.counter(
+    "glonax_control_failed_total", "Controls that could not be sent"
+)
+
+
+class ControlWriter:
+    """
+    Writer thread for outgoing control messages.
+
+    Controls are sent in lane order: everything in the urgent lane goes
+    before the normal lane, which is sent first in, first out. Keys in
+    `coalesce` are setpoints; only their latest value is kept and each is
+    sent at most `rate` times per second. An urgent control discards
+    pending setpoints, so a stale setpoint cannot follow a shutdown.
+
+    Every submit returns a future that completes once the control is
+    written, or holds the error if it could not be. A replaced setpoint
+    completes when the value that replaced it is written; a setpoint
+    discarded by an urgent control is cancelled.
+
+    Args:
+        send (Callable): Sends one encoded control, called from the writer thread.
+        priorities (dict): Lane per key, keys not listed use the normal lane.
+        coalesce (frozenset): Keys whose pending value is replaced by newer ones.
+        rate (float): Maximum sends per second of each coalesced key.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[bytes], Any],
+        priorities: dict[Hashable, int] | None = None,
+        coalesce: frozenset = frozenset(),
+        rate: float = 20.0,
+    ):
+        self.send = send
+        self.priorities = priorities or {}
+        self.coalesce = coalesce
+        self.rate = rate
+
+        self._lanes = {
+            URGENT: collections.deque(),
+            NORMAL: collections.deque(),
+        }
+        # Latest pending setpoint, when it was first submitted and the
+        # futures of every value it replaced, per key
+        self._setpoints: dict[Hashable, tuple[bytes, float, list[Future]]] = {}
+        self._last_sent: dict[Hashable, float] = {}
+
+        self._condition = threading.Condition()
+        self._thread: threading.Thread | None = None
+        self._running = False
+
+        self._queue_seconds = {
+            URGENT: QUEUE_SECONDS.labels("urgent"),
+            NORMAL: QUEUE_SECONDS.labels("normal"),
+            None: QUEUE_SECONDS.labels("setpoint"),
+        }
+
+    def start(self):
+        if self._running:
+            return
+
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="control", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float | None = None):
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def submit(self, key: Hashable, payload: bytes) -> Future:
+        """
+        Queues an encoded control.
+
+        Returns:
+            Future: Completes once the control is written to the connection.
+        """
+        now = time.monotonic()
+        future = Future()
+
+        with self._condition:
+            if key in self.coalesce:
+                if key in self._setpoints:
+                    COALESCED.inc()
+                    _, submitted, futures = self._setpoints[key]
+                    futures.append(future)
+                    self._setpoints[key] = (payload, submitted, futures)
+                else:
+                    self._setpoints[key] = (payload, now, [future])
+            else:
+                lane = self.priorities.get(key, NORMAL)
+                if lane == URGENT:
+                    for _, _, futures in self._setpoints.values():
+                        for discarded in futures:
+                            discarded.cancel()
+                    self._setpoints.clear()
+                self._lanes[lane].append((payload, now, [future]))
+
+            self._condition.notify()
+
+        return future
+
+    def pending(self) -> int:
+        with self._condition:
+            return sum(map(len, self._lanes.values())) + len(self._setpoints)
+
+    def _next(self) -> tuple[Any, bytes, float, list[Future]] | None:
+        """
+        Takes the next control that is due, or waits until one could be and
+        returns None. Called with the lock held.
+        """
+        for lane, queue in self._lanes.items():
+            if queue:
+                return (lane, *queue.popleft())
+
+        now = time.monotonic()
+        interval = 1 / self.rate if self.rate else 0.0
+
+        wait = None
+        for key, (payload, submitted, futures) in self._setpoints.items():
+            last_sent = self._last_sent.get(key)
+            due = now if last_sent is None else last_sent + interval
+            if due <= now:
+                del self._setpoints[key]
+                self._last_sent[key] = now
+                return None, payload, submitted, futures
+
+            wait = due - now if wait is None else min(wait, due - now)
+
+        self._condition.wait(wait)
+        return None
+
+    def _run(self):
+        while True:
+            with self._condition:
+                if not self._running:
+                    break
+
+                item = self._next()
+                if item is None:
+                    continue
+
+            lane, payload, submitted, futures = item
+            self._queue_seconds[lane].observe(time.monotonic() - submitted)
+
+            try:
+                self.send(payload)
+            except OSError as e:
+                FAILED.inc()
+                logger.warning(f"Failed to send control: {e}")
+                for future in futures:
+                    if not future.cancelled():
+                        future.set_exception(e)
+            else:
+                for future in futures:
+                    if not future.cancelled():
+                        future.set_result(None)
@@ -0,0 +1,75 @@
+import os
+import threading
+import time
+
+import psutil
+
+
+class HostFacts:
+    """
+    Facts about the host, collected without forking a process.
+
+    Static facts such as the hostname, kernel and total memory are read
+    once from `os.uname` and psutil (which reads /proc) on first use and
+    cached. Call `invalidate` after something changed them, for example
+    a hostname change; the next access collects them again.
+    """
+
+    def __init__(self):
+        self._static: dict | None = None
+        self._lock = threading.Lock()
+
+    def _collect(self) -> dict:
+        uname = os.uname()
+
+        return {
+            "hostname": uname.nodename,
+            "kernel": uname.release,
+            "machine": uname.machine,
+            "cpu_count": psutil.cpu_count() or 1,
+            "memory_total": psutil.virtual_memory().total,
+            "boot_time": psutil.boot_time(),
+        }
+
+    def static(self) -> dict:
+        facts = self._static
+        if facts is None:
+            with self._lock:
+                if self._static is None:
+                    self._static = self._collect()
+                facts = self._static
+        return facts
+
+    def invalidate(self):
+        self._static = None
+
+    @property
+    def hostname(self) -> str:
+        return self.static()["hostname"]
+
+    @property
+    def kernel(self) -> str:
+        return self.static()["kernel"]
+
+    @property
+    def machine(self) -> str:
+        return self.static()["machine"]
+
+    @property
+    def cpu_count(self) -> int:
+        return self.static()["cpu_count"]
+
+    @property
+    def memory_total(self) -> int:
+        return self.static()["memory_total"]
+
+    @property
+    def boot_time(self) -> float:
+        return self.static()["boot_time"]
+
+    def uptime(self) -> int:
+        """Seconds since boot."""
+        return round(time.time() - self.boot_time)
+
+
+FACTS = HostFacts()
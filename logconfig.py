@@ -0,0 +1,177 @@
+import atexit
+import logging
+import logging.handlers
+import queue
+import threading
+import time
+
+
+# Records waiting for the listener thread, new records are dropped beyond this.
+QUEUE_SIZE = 10000
+
+FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Passes at most one record per topic every `interval` seconds.
+
+    Records opt in with `extra={"topic": ...}`; records without a topic
+    always pass. The number of records suppressed since the last one that
+    passed is appended to the next record of the topic, or reported by
+    `flush` if the topic has gone quiet.
+    """
+
+    def __init__(self, interval: float = 5.0):
+        super().__init__()
+        self.interval = interval
+
+        # Topic to the time the last record passed, the suppressed count and
+        # the last suppressed record
+        self._topics: dict[str, list] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        topic = getattr(record, "topic", None)
+        if topic is None:
+            return True
+
+        now = time.monotonic()
+        with self._lock:
+            state = self._topics.get(topic)
+            if state is None:
+                self._topics[topic] = [now, 0, None]
+                return True
+
+            if now - state[0] < self.interval:
+                state[1] += 1
+                state[2] = record
+                return False
+
+            suppressed = state[1]
+            state[0] = now
+            state[1] = 0
+            state[2] = None
+
+        if suppressed:
+            # Format now, the message may hold a literal % or mapping args
+            record.msg = f"{record.getMessage()} ({suppressed} similar suppressed)"
+            record.args = ()
+
+        return True
+
+    def flush(self, force: bool = False) -> list[logging.LogRecord]:
+        """
+        Reports the suppressed records of topics that stayed quiet.
+
+        Args:
+            force (bool): Report every topic with suppressed records, even
+                if its interval has not passed yet.
+
+        Returns:
+            list[LogRecord]: One summary per topic, at the level and logger
+            of the last record suppressed in it.
+        """
+        now = time.monotonic()
+        summaries = []
+
+        with self._lock:
+            for topic, state in self._topics.items():
+                last_passed, suppressed, last = state
+                if not suppressed or (not force and now - last_passed < self.interval):
+                    continue
+
+                summaries.append(
+                    logging.LogRecord(
+                        last.name,
+                        last.levelno,
+                        last.pathname,
+                        last.lineno,
+                        "%s: %d similar suppressed",
+                        (topic, suppressed),
+                        None,
+                    )
+                )
+                state[0] = now
+                state[1] = 0
+                state[2] = None
+
+        return summaries
+
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queue handler that leaves formatting to the listener thread.
+
+    The stock handler formats every record before queueing it, on the thread
+    that logged. Here the record is queued as is, so the arguments must not
+    be changed after logging them. Records are dropped when the queue is
+    full rather than blocking the caller.
+    """
+
+    def __init__(self, queue: queue.Queue):
+        super().__init__(queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def setup(
+    level: int | str = logging.INFO, interval: float = 5.0
+) -> logging.handlers.QueueListener:
+    """
+    Logs through a background thread with per topic rate limits.
+
+    Replaces the handlers of the root logger. Records are filtered on the
+    logging thread, queued without formatting and written to stderr by a
+    listener thread, which is stopped at exit. Suppressed counts of topics
+    that went quiet are queued every `interval` seconds and at exit.
+
+    Args:
+        level (int | str): Level of the root logger.
+        interval (float): Seconds between records of the same topic.
+
+    Returns:
+        QueueListener: The running listener.
+    """
+    records = queue.Queue(QUEUE_SIZE)
+
+    output = logging.StreamHandler()
+    output.setFormatter(logging.Formatter(FORMAT))
+
+    limiter = RateLimitFilter(interval)
+    handler = LazyQueueHandler(records)
+    handler.addFilter(limiter)
+
+    root = logging.getLogger()
+    for existing in root.handlers[:]:
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level)
+
+    listener = logging.handlers.QueueListener(records, output)
+    listener.start()
+
+    def flush():
+        while True:
+            time.sleep(interval)
+            for record in limiter.flush():
+                handler.enqueue(record)
+
+    threading.Thread(target=flush, name="log-flush", daemon=True).start()
+
+    def stop():
+        for record in limiter.flush(force=True):
+            handler.enqueue(record)
+        listener.stop()
+
+    atexit.register(stop)
+
+    return listener
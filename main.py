@@ -5,130 +5,237 @@ import logging
 import threading
 import configparser
 import websocket
-import json
+from typing import Literal
 
 from glonax import client as gclient
+from glonax import metrics
 from glonax.client import GlonaxServiceBase
 from glonax.message import Engine, ModuleStatus, Gnss
-from pydantic import BaseModel, ValidationError
-
-
-logging.basicConfig(
-    level=logging.DEBUG,
+from glonax.timeseries import TimeSeriesStore
+from typing_extensions import TypedDict
+from channel import (
+    TOPIC_TYPES,
+    UPSTREAM_ENCODINGS,
+    ChannelMessage,
+    Signal,
+    encode_json,
+    encode_lxr,
 )
+import logconfig
+from changes import UPLINK_POLICIES, ChangeDetector
+from commands import COMMAND_TOPIC, CommandDispatcher
+from router import Router
+from spool import Spool
+from uplink import UplinkSender
+
 
 config = configparser.ConfigParser()
 logger = logging.getLogger()
 
 is_connected = False
+upstream_encoding = "json"
+
+SEND_SECONDS = metrics.REGISTRY.histogram(
+    "bridge_send_seconds", "Time spent sending upstream", ("encoding",)
+)
+SPOOLED = metrics.REGISTRY.counter(
+    "bridge_spooled_total", "Signals stored while the upstream is down"
+)
+FORWARDED = metrics.REGISTRY.counter(
+    "bridge_forwarded_total", "Signals forwarded upstream", ("topic",)
+)
+SUPPRESSED = metrics.REGISTRY.counter(
+    "bridge_suppressed_total", "Signals suppressed by change detection", ("topic",)
+)
 
 ws: websocket.WebSocketApp | None = None
+ws_backoff = gclient.Backoff()
+spool: Spool | None = None
+commands = CommandDispatcher()
 
 
-class ChannelMessage(BaseModel):
-    type: str
-    topic: str
-    data: dict | None = None
+class EncodingData(TypedDict):
+    encoding: Literal[tuple(UPSTREAM_ENCODINGS)]
 
 
-def on_message(ws, message):
+router = Router()
+
+
+def send_reply(reply: ChannelMessage):
+    if not (is_connected and ws):
+        logger.warning(f"Dropped {reply.topic} {reply.type}, upstream is down")
+        return
+
     try:
-        data = json.loads(message)  # Assuming JSON messages
+        ws.send(reply.model_dump_json())
+    except (websocket.WebSocketException, OSError) as e:
+        logger.warning(f"Failed to send {reply.topic} {reply.type}: {e}")
 
-        message = ChannelMessage(**data)
 
-        print("Received message:", message)
+@router.route("command", COMMAND_TOPIC)
+def on_command(message: ChannelMessage):
+    commands.dispatch(message, send_reply)
 
-    except json.JSONDecodeError:
-        print("Received raw message:", message)
-    except ValidationError as e:
-        print("Validation error:", e)
+
+@router.route("signal", "encoding", EncodingData)
+def on_encoding(message: ChannelMessage):
+    global upstream_encoding
+
+    logger.info(f"Upstream encoding: {message.data['encoding']}")
+    upstream_encoding = message.data["encoding"]
+
+
+def on_message(ws, message):
+    reply = router.dispatch(message)
+    if reply is not None:
+        ws.send(reply.model_dump_json())
 
 
 def on_error(ws, error):
-    print("Error:", error)
+    logger.error(f"Websocket error: {error}")
 
 
 def on_close(ws, close_status_code, close_msg):
-    global is_connected
-    print("### closed ###")
+    global is_connected, upstream_encoding
+    logger.info(f"Websocket closed, uplink: {uplink.stats()}")
 
     is_connected = False
+    upstream_encoding = "json"
 
 
 def on_open(ws):
     global is_connected
 
+    ws_backoff.reset()
+
     if ws:
-        message = ChannelMessage(type="signal", topic="boot")
+        message = ChannelMessage(
+            type="signal", topic="boot", data={"encodings": UPSTREAM_ENCODINGS}
+        )
         ws.send(message.model_dump_json())
 
     is_connected = True
 
+    if spool and not spool.empty():
+        threading.Thread(target=replay_spool, name="spool", daemon=True).start()
+
+
+def on_glonax_reconnect(client: gclient.GlonaxClient):
+    logger.info("Reconnected to the Glonax server")
+
+
+def on_glonax_rtt(client: gclient.GlonaxClient, rtt: float):
+    uplink.submit(("link", None), Signal("link", client.rtt.stats()))
+
+
+def replay_spool():
+    def send(payload: bytes, timestamp: float):
+        if not is_connected:
+            raise ConnectionError("Upstream disconnected during replay")
+        ws.send(payload.decode())
+
+    count = spool.replay(send, rate=config.getfloat("spool", "rate", fallback=50))
+    logger.info(f"Replayed {count} spooled messages")
+
+
+def store_upstream(signals: list[Signal]):
+    if spool:
+        for signal in signals:
+            spool.append(encode_json(signal).encode(), signal.timestamp)
+        SPOOLED.inc(len(signals))
+
+
+def send_upstream(signals: list[Signal]):
+    if not (is_connected and ws):
+        store_upstream(signals)
+        return
+
+    # Signals in the order they go out; those after `sent` are spooled if
+    # the link drops halfway
+    ordered = signals
+    sent = 0
+    try:
+        with SEND_SECONDS.labels(upstream_encoding).time():
+            text = signals
+            if upstream_encoding == "lxr":
+                packed = [s for s in signals if s.topic in TOPIC_TYPES]
+                # Topics without a Glonax message type fall back to JSON
+                text = [s for s in signals if s.topic not in TOPIC_TYPES]
+                ordered = packed + text
+
+                if packed:
+                    data = encode_lxr(packed)
+                    ws.send(data, opcode=websocket.ABNF.OPCODE_BINARY)
+                    sent = len(packed)
+
+            for signal in text:
+                ws.send(encode_json(signal))
+                sent += 1
+    except (websocket.WebSocketException, OSError):
+        # A dropped link surfaces as a plain OSError, such as a broken pipe
+        store_upstream(ordered[sent:])
+        raise
+
+
+uplink = UplinkSender(send_upstream)
+
 
 class GlonaxService(GlonaxServiceBase):
-    global is_connected
+    trusted = True
 
-    status_map = {}
-    status_map_last_update = {}
-    gnss_last: Gnss | None = None
-    gnss_last_update = time.time()
-    engine_last: Engine | None = None
-    engine_last_update = time.time()
+    def __init__(self):
+        self.detector = ChangeDetector(UPLINK_POLICIES)
 
-    def on_status(self, client: gclient.GlonaxClient, status: ModuleStatus):
-        val = self.status_map.get(status.name)
-        last_update = self.status_map_last_update.get(status.name, 0)
-        last_update_elapsed = time.time() - last_update
-        if val is None or val != status or last_update_elapsed > 15:
-            logger.info(f"Status: {status}")
-
-            message = ChannelMessage(
-                type="signal", topic="status", data=status.model_dump()
-            )
+        self.status_map = {}
+        self.gnss_last: Gnss | None = None
+        self.engine_last: Engine | None = None
 
-            if is_connected and ws:
-                # TODO: Only send if the connection is open
-                ws.send(message.model_dump_json())
+        # Local history of the engine and GNSS streams, if enabled
+        self.history: TimeSeriesStore | None = None
 
-            self.status_map[status.name] = status
-            self.status_map_last_update[status.name] = time.time()
+    def _forward(self, client, topic: str, key: str | None, value):
+        data = value.model_dump()
+        if not self.detector.update(topic, key, data):
+            SUPPRESSED.labels(topic).inc()
+            return
 
-    def on_gnss(self, client: gclient.GlonaxClient, gnss: Gnss):
-        gnss_last_update_elapsed = time.time() - self.gnss_last_update
-        if self.gnss_last == gnss or gnss_last_update_elapsed > 15:
-            logger.info(f"GNSS: {gnss}")
+        FORWARDED.labels(topic).inc()
 
-            message = ChannelMessage(
-                type="signal", topic="gnss", data=gnss.model_dump()
-            )
+        # Rate limited per module, one busy module must not hide the others
+        log_topic = topic if key is None else f"{topic}.{key}"
+        logger.info("%s: %s", topic, value, extra={"topic": log_topic})
 
-            if is_connected and ws:
-                # TODO: Only send if the connection is open
-                ws.send(message.model_dump_json())
+        # Time the frame arrived, so upstream latency includes the bridge
+        conn = getattr(client, "conn", None)
+        received_at = getattr(conn, "received_at", None)
 
-            self.gnss_last = gnss
-            self.gnss_last_update = time.time()
+        uplink.submit((topic, key), Signal(topic, value, received_at))
 
-    def on_engine(self, client: gclient.GlonaxClient, engine: Engine):
-        engine_last_update_elapsed = time.time() - self.engine_last_update
-        if self.engine_last != engine or engine_last_update_elapsed > 15:
-            logger.info(f"Engine: {engine}")
-            message = ChannelMessage(
-                type="signal", topic="engine", data=engine.model_dump()
-            )
+    def on_status(self, client: gclient.GlonaxClient, status: ModuleStatus):
+        self.status_map[status.name] = status
+        self._forward(client, "status", status.name, status)
 
-            if is_connected and ws:
-                # TODO: Only send if the connection is open
-                ws.send(message.model_dump_json())
+    def on_gnss(self, client: gclient.GlonaxClient, gnss: Gnss):
+        self.gnss_last = gnss
+        if self.history:
+            self.history.append_gnss(gnss)
+        self._forward(client, "gnss", None, gnss)
 
-            self.engine_last = engine
-            self.engine_last_update = time.time()
+    def on_engine(self, client: gclient.GlonaxClient, engine: Engine):
+        self.engine_last = engine
+        if self.history:
+            self.history.append_engine(engine)
+        self._forward(client, "engine", None, engine)
 
 
 if __name__ == "__main__":
     config.read("config.ini")
 
+    logconfig.setup(
+        config.get("logging", "level", fallback="INFO"),
+        config.getfloat("logging", "interval", fallback=5),
+    )
+
     glonax_address = config["glonax"]["address"]
     # glonax_port = config["glonax"]["port"]
 
@@ -146,10 +253,51 @@ if __name__ == "__main__":
     def glonax_function():
         glonax_service = GlonaxService()
 
-        client = gclient.GlonaxClient(glonax_address)
+        history = config.get("history", "path", fallback=None)
+        if history:
+            glonax_service.history = TimeSeriesStore(
+                history,
+                retention=config.getfloat("history", "retention_hours", fallback=168)
+                * 3600,
+            )
+
+        client = gclient.GlonaxClient(
+            glonax_address,
+            on_reconnect=on_glonax_reconnect,
+            on_rtt=on_glonax_rtt,
+            timeout=config.getfloat("glonax", "timeout", fallback=10),
+        )
+
+        commands.client = client
+
+        client.start_probes(config.getfloat("glonax", "probe_interval", fallback=5))
+
+        capture = config.get("glonax", "capture", fallback=None)
+        if capture:
+            client.start_capture(capture)
+
         client.listen(glonax_service)
 
+    metrics_port = config.getint("metrics", "port", fallback=9108)
+    if metrics_port:
+        metrics.serve(metrics_port)
+
+    spool = Spool(
+        config.get("spool", "path", fallback="spool"),
+        max_segments=config.getint("spool", "max_segments", fallback=64),
+    )
+
+    uplink.batch_interval = config.getfloat(
+        "upstream", "batch_interval", fallback=0.1
+    )
+    uplink.start()
+
     x = threading.Thread(target=glonax_function)
     x.start()
 
-    ws.run_forever()
+    while True:
+        ws.run_forever()
+
+        delay = ws_backoff.next()
+        logger.warning(f"Websocket disconnected, reconnecting in {delay:.1f}s")
+        time.sleep(delay)
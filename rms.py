@@ -1,74 +1,165 @@
+import asyncio
 import datetime
-import subprocess
 import logging
+import httpx
 import requests
 
+from hostfacts import FACTS
+
 logger = logging.getLogger(__name__)
 
 
 def get_hostname():
-    """Run the hostname command and return the output as a string"""
-    result = subprocess.run(["hostname"], capture_output=True, text=True, check=True)
-    return result.stdout.strip()
+    """Return the hostname of this host"""
+    return FACTS.hostname
 
 
 def get_kernel_version():
-    """Run the uname command and return the kernel version"""
-    result = subprocess.run(["uname", "-r"], capture_output=True, text=True, check=True)
-    return result.stdout.strip()
+    """Return the kernel version of this host"""
+    return FACTS.kernel
+
+
+class ResponseCache:
+    """
+    Remembers the last response per URL together with its ETag.
+
+    Requests carry the ETag in If-None-Match, and when the server answers
+    304 Not Modified the cached body is returned instead.
+    """
+
+    def __init__(self):
+        self._entries: dict[str, tuple[str, object]] = {}
+
+    def headers(self, url: str) -> dict:
+        entry = self._entries.get(url)
+        if entry is None:
+            return {}
+        return {"If-None-Match": entry[0]}
+
+    def resolve(self, url: str, response):
+        """
+        Returns the body for a response, from the cache if it was not modified.
+
+        Works with both `requests` and `httpx` responses.
+        """
+        if response.status_code == 304 and url in self._entries:
+            return self._entries[url][1]
+
+        response.raise_for_status()
 
+        data = response.json()
+        etag = response.headers.get("ETag")
+        if etag:
+            self._entries[url] = (etag, data)
+        else:
+            self._entries.pop(url, None)
+        return data
 
-class RemoteManagementService:
+    def clear(self):
+        self._entries.clear()
+
+
+class RemoteManagementBase:
     def __init__(self, host, auth, instance):
         self.host = host
         self.auth = auth
         self.instance = instance
+        self.cache = ResponseCache()
 
     def _call_headers(self):
         return {
             "Authorization": f"Bearer {self.auth}",
         }
 
+    def _telemetry_url(self):
+        return f"{self.host}/api/{self.instance.id}/telemetry"
+
+    def _manifest_url(self):
+        return f"{self.host}{self.instance.id}/manifest"
+
+    def _commands_url(self):
+        return f"{self.host}{self.instance.id}/command"
+
+    def _client_url(self):
+        return f"{self.host}/client"
+
+    def _telemetry_data(self, vms):
+        hostname = get_hostname()
+        kernel_version = get_kernel_version()
+        utc_now = datetime.datetime.now(datetime.timezone.utc)
+
+        data = {
+            "instance": {
+                "id": str(self.instance.id),
+                "model": self.instance.model,
+                # TODO: Add machine type
+                "version": self.instance.version,
+                "serial_number": self.instance.serial_number,
+            },
+            "meta": {
+                "hostname": hostname,
+                "kernel": kernel_version,
+                "datetime": utc_now.isoformat(),
+            },
+        }
+
+        # TODO: Why not use psutil?
+        data["host"] = {
+            "cpu1": vms.cpu_load[0],
+            "cpu5": vms.cpu_load[1],
+            "cpu15": vms.cpu_load[2],
+            "mem_used": vms.memory[0],
+            "mem_total": vms.memory[1],
+            "uptime": vms.uptime,
+        }
+
+        # TODO: Connect to the actual engine
+        data["engine"] = {
+            "rpm": 0,
+        }
+
+        return data
+
+
+class RemoteManagementService(RemoteManagementBase):
+    """
+    Remote management client sharing one pooled HTTP session.
+
+    The manifest and commands are fetched conditionally, unchanged
+    responses are served from the local cache.
+    """
+
+    def __init__(self, host, auth, instance, pool_size: int = 4):
+        super().__init__(host, auth, instance)
+
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=pool_size, pool_maxsize=pool_size
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        self.session.close()
+
+    def _fetch(self, url):
+        headers = self._call_headers() | self.cache.headers(url)
+        response = self.session.get(url, headers=headers, timeout=5)
+        return self.cache.resolve(url, response)
+
     def register_telemetry(self, vms):
-        url = f"{self.host}/api/{self.instance.id}/telemetry"
+        url = self._telemetry_url()
 
         try:
-            hostname = get_hostname()
-            kernel_version = get_kernel_version()
-            utc_now = datetime.datetime.now(datetime.timezone.utc)
-
-            data = {
-                "instance": {
-                    "id": str(self.instance.id),
-                    "model": self.instance.model,
-                    # TODO: Add machine type
-                    "version": self.instance.version,
-                    "serial_number": self.instance.serial_number,
-                },
-                "meta": {
-                    "hostname": hostname,
-                    "kernel": kernel_version,
-                    "datetime": utc_now.isoformat(),
-                },
-            }
-
-            # TODO: Why not use psutil?
-            data["host"] = {
-                "cpu1": vms.cpu_load[0],
-                "cpu5": vms.cpu_load[1],
-                "cpu15": vms.cpu_load[2],
-                "mem_used": vms.memory[0],
-                "mem_total": vms.memory[1],
-                "uptime": vms.uptime,
-            }
-
-            # TODO: Connect to the actual engine
-            data["engine"] = {
-                "rpm": 0,
-            }
-
-            # print(f"Data: {data}")
-            response = requests.post(
+            data = self._telemetry_data(vms)
+
+            response = self.session.post(
                 url, json=data, headers=self._call_headers(), timeout=15
             )
             response.raise_for_status()
@@ -76,34 +167,98 @@ class RemoteManagementService:
             logger.error(f"Error: {e}")
 
     def fetch_manifest(self):
-        url = f"{self.host}{self.instance.id}/manifest"
+        try:
+            return self._fetch(self._manifest_url())
+        except Exception as e:
+            logger.error(f"Error: {e}")
+
+    def fetch_commands(self):
+        try:
+            return self._fetch(self._commands_url())
+        except Exception as e:
+            logger.error(f"Error: {e}")
+
+    def get_remote_client(self):
+        url = self._client_url()
 
         try:
-            response = requests.get(url, headers=self._call_headers(), timeout=5)
+            response = self.session.get(url, timeout=5)
             response.raise_for_status()
 
             return response.json()
         except Exception as e:
             logger.error(f"Error: {e}")
 
-    def fetch_commands(self):
-        url = f"{self.host}{self.instance.id}/command"
+
+class AsyncRemoteManagementService(RemoteManagementBase):
+    """
+    Asyncio variant of `RemoteManagementService` on a pooled `httpx.AsyncClient`.
+
+    Use `poll` to fetch the manifest and commands concurrently.
+    """
+
+    def __init__(self, host, auth, instance, pool_size: int = 4):
+        super().__init__(host, auth, instance)
+
+        self.session = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=pool_size)
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def close(self):
+        await self.session.aclose()
+
+    async def _fetch(self, url):
+        headers = self._call_headers() | self.cache.headers(url)
+        response = await self.session.get(url, headers=headers, timeout=5)
+        return self.cache.resolve(url, response)
+
+    async def register_telemetry(self, vms):
+        url = self._telemetry_url()
 
         try:
-            response = requests.get(url, headers=self._call_headers(), timeout=5)
+            data = self._telemetry_data(vms)
+
+            response = await self.session.post(
+                url, json=data, headers=self._call_headers(), timeout=15
+            )
             response.raise_for_status()
+        except Exception as e:
+            logger.error(f"Error: {e}")
 
-            return response.json()
+    async def fetch_manifest(self):
+        try:
+            return await self._fetch(self._manifest_url())
         except Exception as e:
             logger.error(f"Error: {e}")
 
-    def get_remote_client(self):
-        url = f"{self.host}/client"
+    async def fetch_commands(self):
+        try:
+            return await self._fetch(self._commands_url())
+        except Exception as e:
+            logger.error(f"Error: {e}")
+
+    async def get_remote_client(self):
+        url = self._client_url()
 
         try:
-            response = requests.get(url, timeout=5)
+            response = await self.session.get(url, timeout=5)
             response.raise_for_status()
 
             return response.json()
         except Exception as e:
             logger.error(f"Error: {e}")
+
+    async def poll(self):
+        """
+        Fetches the manifest and the commands concurrently.
+
+        Returns:
+            tuple: The manifest and the commands, None for a failed fetch.
+        """
+        return await asyncio.gather(self.fetch_manifest(), self.fetch_commands())
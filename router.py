@@ -0,0 +1,135 @@
+import logging
+from typing import Any, Callable
+
+from pydantic import TypeAdapter, ValidationError
+from typing_extensions import NotRequired, TypedDict
+
+from glonax import metrics
+from channel import ChannelMessage
+
+
+logger = logging.getLogger(__name__)
+
+ROUTED = metrics.REGISTRY.counter(
+    "router_routed_total", "Inbound messages dispatched to a handler", ("topic",)
+)
+REJECTED = metrics.REGISTRY.counter(
+    "router_rejected_total", "Inbound messages rejected by the router", ("reason",)
+)
+ROUTE_SECONDS = metrics.REGISTRY.histogram(
+    "router_seconds", "Time to validate and handle an inbound message", ("topic",)
+)
+
+
+class Envelope(TypedDict):
+    type: str
+    topic: str
+    data: NotRequired[dict | None]
+    timestamp: NotRequired[float | None]
+
+
+ENVELOPE = TypeAdapter(Envelope)
+
+
+class Route:
+    __slots__ = ("handler", "adapter", "routed", "seconds")
+
+    def __init__(self, topic: str, handler: Callable, data_type: Any = None):
+        self.handler = handler
+        self.adapter = TypeAdapter(data_type) if data_type is not None else None
+        self.routed = ROUTED.labels(topic)
+        self.seconds = ROUTE_SECONDS.labels(topic)
+
+
+class Router:
+    """
+    Routes inbound channel messages to handlers by type and topic.
+
+    The envelope is parsed straight from the raw text or bytes into plain
+    dicts. Messages without a route are rejected at that point, before any
+    model is built. For routed messages a `ChannelMessage` is constructed
+    without validating again, and the `data` is validated with the type the
+    route was registered with, if any. Validators are compiled once, when
+    the route is added.
+    """
+
+    def __init__(self):
+        self._routes: dict[tuple[str, str], Route] = {}
+
+        self._unknown = REJECTED.labels("unknown")
+        self._invalid = REJECTED.labels("invalid")
+
+    def add(self, type: str, topic: str, handler: Callable, data_type: Any = None):
+        """
+        Registers a handler for messages with the given type and topic.
+
+        Args:
+            handler (Callable): Called with the `ChannelMessage`, its return
+                value is returned from `dispatch`.
+            data_type: Type the message data must validate as, such as a
+                model or a TypedDict. The validated value replaces the data.
+        """
+        self._routes[(type, topic)] = Route(topic, handler, data_type)
+
+    def route(self, type: str, topic: str, data_type: Any = None):
+        """Decorator form of `add`."""
+
+        def decorator(handler: Callable) -> Callable:
+            self.add(type, topic, handler, data_type)
+            return handler
+
+        return decorator
+
+    def dispatch(self, raw: str | bytes):
+        """
+        Validates an inbound message and passes it to its handler.
+
+        Returns:
+            The handler result, or None if the message was rejected.
+        """
+        try:
+            envelope = ENVELOPE.validate_json(raw)
+        except ValidationError as e:
+            self._invalid.inc()
+            logger.warning(
+                "Invalid inbound message: %s",
+                e.errors()[0]["msg"],
+                extra={"topic": "router"},
+            )
+            return None
+
+        route = self._routes.get((envelope["type"], envelope["topic"]))
+        if route is None:
+            self._unknown.inc()
+            logger.debug(
+                "No route for %s/%s",
+                envelope["type"],
+                envelope["topic"],
+                extra={"topic": "router"},
+            )
+            return None
+
+        with route.seconds.time():
+            data = envelope.get("data")
+            if route.adapter is not None:
+                try:
+                    data = route.adapter.validate_python(data)
+                except ValidationError as e:
+                    self._invalid.inc()
+                    logger.warning(
+                        "Invalid %s data: %s",
+                        envelope["topic"],
+                        e,
+                        extra={"topic": "router"},
+                    )
+                    return None
+
+            message = ChannelMessage.model_construct(
+                type=envelope["type"],
+                topic=envelope["topic"],
+                data=data,
+                timestamp=envelope.get("timestamp"),
+            )
+
+            route.routed.inc()
+            return route.handler(message)
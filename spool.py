@@ -0,0 +1,231 @@
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+# Payload length and the original Unix timestamp of the message.
+RECORD_HEADER = struct.Struct(">Id")
+
+
+class Segment:
+    """A fixed size, zero filled and memory mapped log file."""
+
+    def __init__(self, path: str, size: int):
+        self.path = path
+
+        exists = os.path.exists(path)
+        with open(path, "a+b") as f:
+            if not exists or os.path.getsize(path) != size:
+                f.truncate(size)
+            self.map = mmap.mmap(f.fileno(), size)
+
+        self.size = size
+        self.end = 0
+
+        # Find the end of the written records, a zero length marks free space
+        record = self.read(self.end)
+        while record is not None:
+            self.end += RECORD_HEADER.size + len(record[0])
+            record = self.read(self.end)
+
+    def read(self, offset: int) -> tuple[bytes, float] | None:
+        if offset + RECORD_HEADER.size > self.size:
+            return None
+
+        length, timestamp = RECORD_HEADER.unpack_from(self.map, offset)
+        if length == 0:
+            return None
+
+        start = offset + RECORD_HEADER.size
+        return self.map[start : start + length], timestamp
+
+    def append(self, payload: bytes, timestamp: float) -> bool:
+        size = RECORD_HEADER.size + len(payload)
+        if self.end + size > self.size:
+            return False
+
+        # Write the payload before the header, so a record is only visible
+        # once it is complete.
+        start = self.end + RECORD_HEADER.size
+        self.map[start : start + len(payload)] = payload
+        RECORD_HEADER.pack_into(self.map, self.end, len(payload), timestamp)
+        self.end += size
+        return True
+
+    def close(self):
+        self.map.close()
+
+    def remove(self):
+        self.close()
+        os.remove(self.path)
+
+
+class Spool:
+    """
+    Append-only, segment based on-disk log of upstream messages.
+
+    Messages are stored while the upstream is unavailable and replayed in
+    order once it is back. The log is split into memory mapped segments of
+    `segment_size` bytes. When there are more than `max_segments` segments
+    the oldest is removed, so the disk usage is bounded.
+
+    Delivery is at least once: a segment is removed after it has been
+    replayed, so a restart during a replay can send messages again.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        segment_size: int = 4 * 1024 * 1024,
+        max_segments: int = 64,
+    ):
+        self.path = path
+        self.segment_size = segment_size
+        self.max_segments = max_segments
+
+        self.evicted = 0
+
+        self._lock = threading.Lock()
+        self._replay_lock = threading.Lock()
+
+        os.makedirs(path, exist_ok=True)
+
+        self._segments: list[tuple[int, Segment]] = []
+        for name in sorted(os.listdir(path)):
+            if name.endswith(".seg"):
+                sequence = int(name[:-4], 16)
+                self._segments.append((sequence, self._open(sequence)))
+
+        if not self._segments:
+            self._segments.append((0, self._open(0)))
+
+        # Replay position within the oldest segment
+        self._offset = 0
+
+    def _open(self, sequence: int) -> Segment:
+        return Segment(
+            os.path.join(self.path, f"{sequence:016x}.seg"), self.segment_size
+        )
+
+    def empty(self) -> bool:
+        with self._lock:
+            _, segment = self._segments[0]
+            return len(self._segments) == 1 and segment.end == self._offset
+
+    def append(self, payload: bytes, timestamp: float | None = None):
+        """
+        Appends a message to the log.
+
+        Args:
+            payload (bytes): The message as sent upstream.
+            timestamp (float | None): The original Unix timestamp of the message.
+        """
+        if timestamp is None:
+            timestamp = time.time()
+
+        if RECORD_HEADER.size + len(payload) > self.segment_size:
+            raise ValueError("Message does not fit in a segment")
+
+        with self._lock:
+            _, segment = self._segments[-1]
+            if not segment.append(payload, timestamp):
+                self._roll()
+                self._segments[-1][1].append(payload, timestamp)
+
+    def _roll(self):
+        sequence = self._segments[-1][0] + 1
+        self._segments.append((sequence, self._open(sequence)))
+
+        while len(self._segments) > self.max_segments:
+            evicted, segment = self._segments.pop(0)
+            segment.remove()
+            self.evicted += 1
+
+            logger.warning(f"Spool full, evicted segment {evicted:016x}")
+
+            self._offset = 0
+
+    def _peek(self) -> tuple[int, bytes, float] | None:
+        with self._lock:
+            sequence, segment = self._segments[0]
+
+            record = segment.read(self._offset)
+            if record is None:
+                if len(self._segments) == 1:
+                    return None
+
+                # Move on to the next segment, the replayed one is done
+                self._segments.pop(0)
+                segment.remove()
+                self._offset = 0
+
+                sequence, segment = self._segments[0]
+                record = segment.read(0)
+
+            return sequence, *record
+
+    def _commit(self, sequence: int, payload: bytes):
+        with self._lock:
+            # The segment may have been evicted while the message was sent
+            if self._segments[0][0] != sequence:
+                return
+
+            self._offset += RECORD_HEADER.size + len(payload)
+
+            _, segment = self._segments[0]
+            if len(self._segments) == 1 and self._offset == segment.end:
+                # Everything is replayed, start over with an empty segment
+                segment.remove()
+                self._segments[0] = (sequence + 1, self._open(sequence + 1))
+                self._offset = 0
+
+    def replay(self, send: Callable[[bytes, float], None], rate: float = 50.0) -> int:
+        """
+        Sends the stored messages in order, oldest first.
+
+        Stops at the first failing send; that message stays in the log. Only
+        one replay runs at a time, other calls return immediately.
+
+        Args:
+            send (Callable): Called with the payload and original timestamp.
+            rate (float): Maximum number of messages per second.
+
+        Returns:
+            int: The number of messages replayed.
+        """
+        if not self._replay_lock.acquire(blocking=False):
+            return 0
+
+        count = 0
+        try:
+            while True:
+                record = self._peek()
+                if record is None:
+                    break
+
+                sequence, payload, timestamp = record
+
+                try:
+                    send(payload, timestamp)
+                except Exception as e:
+                    logger.error(f"Error: {e}")
+                    break
+
+                self._commit(sequence, payload)
+                count += 1
+
+                time.sleep(1 / rate)
+        finally:
+            self._replay_lock.release()
+
+        return count
+
+    def close(self):
+        with self._lock:
+            for _, segment in self._segments:
+                segment.close()
@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+
+import asyncio
+import multiprocessing
+import pickle
+import time
+import zlib
+import logging
+from multiprocessing.connection import Connection
+
+import logconfig
+from glonax import metrics
+from gateway import Machine, Upstream, config, keep_running, load_machines
+
+
+logger = logging.getLogger(__name__)
+
+# Fields of a frame from a worker: instance, topic, key and the upstream
+# message. None of them contain a NUL byte, JSON escapes control characters.
+FIELD_SEPARATOR = b"\x00"
+
+# Prefix of a metrics snapshot from a worker. Instance names never start
+# with a NUL byte, so it cannot be mistaken for a frame.
+METRICS_PREFIX = b"\x00metrics\x00"
+
+# Seconds between the metrics snapshots a worker reports.
+METRICS_INTERVAL = 5.0
+
+# A worker restarting this often within the window is retired and its
+# machines move to the other workers.
+MAX_RESTARTS = 5
+RESTART_WINDOW = 60.0
+
+WORKERS_ALIVE = metrics.REGISTRY.gauge(
+    "gateway_workers_alive", "Worker processes currently running"
+)
+WORKER_RESTARTS = metrics.REGISTRY.counter(
+    "gateway_worker_restarts_total", "Worker processes restarted after a crash"
+)
+FRAMES = metrics.REGISTRY.counter(
+    "gateway_worker_frames_total", "Upstream messages received from workers"
+)
+
+
+def shard(instance: str, slots: list[int]) -> int:
+    """
+    Picks the worker slot for an instance by rendezvous hashing.
+
+    Every slot scores the instance with a CRC32 and the highest score wins,
+    so retiring a slot only moves the machines that were on it.
+    """
+    return max(slots, key=lambda slot: zlib.crc32(f"{slot}:{instance}".encode()))
+
+
+def encode_frame(instance: bytes, topic: str, key: str | None, text: str) -> bytes:
+    return FIELD_SEPARATOR.join(
+        (instance, topic.encode(), (key or "").encode(), text.encode())
+    )
+
+
+def decode_frame(data: bytes) -> tuple[str, str, str | None, str]:
+    instance, topic, key, text = data.split(FIELD_SEPARATOR, 3)
+    return instance.decode(), topic.decode(), key.decode() or None, text.decode()
+
+
+async def _worker(
+    machines: list[tuple[str, str, int]],
+    frames: Connection,
+    control: Connection,
+    timeout: float | None,
+):
+    loop = asyncio.get_running_loop()
+    closed = loop.create_future()
+
+    # Machine tasks by instance; a machine that raises is restarted by
+    # `keep_running`, a task that ends anyway ends the worker
+    tasks: dict[str, asyncio.Task] = {}
+
+    def on_done(task: asyncio.Task):
+        if task.cancelled() or closed.done():
+            return
+        closed.set_exception(
+            task.exception() or RuntimeError(f"{task.get_name()} stopped")
+        )
+
+    def add(instance: str, address: str, port: int):
+        prefix = instance.encode()
+
+        def sink(topic: str, key: str | None, text: str):
+            frames.send_bytes(encode_frame(prefix, topic, key, text))
+
+        machine = Machine(instance, address, port, sink, timeout)
+        task = loop.create_task(
+            keep_running(f"{instance}: machine", machine.run), name=instance
+        )
+        task.add_done_callback(on_done)
+        tasks[instance] = task
+
+    async def report_metrics():
+        # Machine metrics live in this process, the supervisor serves them
+        while True:
+            await asyncio.sleep(METRICS_INTERVAL)
+            snapshot = pickle.dumps(metrics.REGISTRY.snapshot())
+            frames.send_bytes(METRICS_PREFIX + snapshot)
+
+    def on_control():
+        try:
+            while control.poll():
+                add(*control.recv())
+        except (EOFError, OSError) as e:
+            # The supervisor is gone
+            loop.remove_reader(control.fileno())
+            if not closed.done():
+                closed.set_exception(e)
+
+    for machine in machines:
+        add(*machine)
+
+    reporter = loop.create_task(report_metrics(), name="metrics")
+    reporter.add_done_callback(on_done)
+
+    loop.add_reader(control.fileno(), on_control)
+    await closed
+
+
+def worker_main(
+    machines: list[tuple[str, str, int]],
+    frames: Connection,
+    control: Connection,
+    level: int = logging.INFO,
+    timeout: float | None = None,
+):
+    """
+    Entry point of a worker process.
+
+    Serves the given machines and any machine sent over `control` later.
+    Decoding and change detection happen here; only the serialized upstream
+    messages are sent back over `frames`, along with a periodic snapshot of
+    the worker metrics.
+    """
+    logconfig.setup(level)
+
+    try:
+        asyncio.run(_worker(machines, frames, control, timeout))
+    except (EOFError, OSError, KeyboardInterrupt):
+        pass
+
+
+class Worker:
+    def __init__(self, slot: int):
+        self.slot = slot
+        self.machines: list[tuple[str, str, int]] = []
+        self.process: multiprocessing.Process | None = None
+        self.frames: Connection | None = None
+        self.control: Connection | None = None
+        self.restarts: list[float] = []
+
+
+class Supervisor:
+    """
+    Shards the gateway machines across worker processes.
+
+    Workers hold the Glonax connections and send serialized upstream
+    messages back over a pipe as raw bytes, so no models are pickled. The
+    supervisor keeps one `Upstream` per instance. Crashed workers are
+    restarted with their machines; a worker that keeps crashing is retired
+    and its machines are rebalanced over the remaining workers.
+
+    Workers report their metrics every `METRICS_INTERVAL` seconds, and the
+    supervisor adds them to its own when `/metrics` is scraped. Metrics of
+    a worker that exited are dropped, so its counters start over when it
+    is restarted.
+
+    Args:
+        machines (list): Instance, address and port per machine.
+        upstream (str): Upstream URI, `{instance}` is replaced per machine.
+        workers (int): Number of worker processes.
+        timeout (float | None): Seconds without data before a machine
+            connection is considered lost.
+    """
+
+    def __init__(
+        self,
+        machines: list[tuple[str, str, int]],
+        upstream: str,
+        workers: int,
+        timeout: float | None = None,
+    ):
+        self.machines = machines
+        self.timeout = timeout
+        self.upstreams = {
+            instance: Upstream(instance, upstream.format(instance=instance))
+            for instance, _, _ in machines
+        }
+        self.workers = {slot: Worker(slot) for slot in range(workers)}
+
+        self._context = multiprocessing.get_context("spawn")
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._channels: list[asyncio.Task] = []
+
+        for machine in machines:
+            slot = shard(machine[0], list(self.workers))
+            self.workers[slot].machines.append(machine)
+
+    def _spawn(self, worker: Worker):
+        frames, frames_child = self._context.Pipe(duplex=False)
+        control_child, control = self._context.Pipe(duplex=False)
+
+        worker.process = self._context.Process(
+            target=worker_main,
+            args=(
+                worker.machines,
+                frames_child,
+                control_child,
+                logging.getLogger().level,
+                self.timeout,
+            ),
+            name=f"gateway-worker-{worker.slot}",
+            daemon=True,
+        )
+        worker.process.start()
+
+        # The child owns its ends now
+        frames_child.close()
+        control_child.close()
+
+        worker.frames = frames
+        worker.control = control
+        self._loop.add_reader(frames.fileno(), self._on_frames, worker)
+
+        logger.info(
+            f"Worker {worker.slot} started with {len(worker.machines)} machines"
+        )
+
+    def _on_frames(self, worker: Worker):
+        try:
+            while worker.frames.poll():
+                data = worker.frames.recv_bytes()
+                if data.startswith(METRICS_PREFIX):
+                    snapshot = pickle.loads(data[len(METRICS_PREFIX) :])
+                    metrics.REGISTRY.update_remote(worker.slot, snapshot)
+                    continue
+
+                instance, topic, key, text = decode_frame(data)
+                self.upstreams[instance].submit(topic, key, text)
+                FRAMES.inc()
+        except (EOFError, OSError):
+            self._loop.remove_reader(worker.frames.fileno())
+
+    def _reap(self, worker: Worker):
+        self._loop.remove_reader(worker.frames.fileno())
+        worker.frames.close()
+        worker.control.close()
+        worker.process.join()
+        metrics.REGISTRY.remove_remote(worker.slot)
+
+    def _retire(self, worker: Worker):
+        del self.workers[worker.slot]
+        if not self.workers:
+            raise RuntimeError("All gateway workers failed")
+
+        logger.error(
+            f"Worker {worker.slot} keeps crashing, moving "
+            f"{len(worker.machines)} machines to the other workers"
+        )
+
+        for machine in worker.machines:
+            target = self.workers[shard(machine[0], list(self.workers))]
+            target.machines.append(machine)
+            try:
+                target.control.send(machine)
+            except OSError:
+                # The target crashed as well and restarts with its machines
+                pass
+
+    def _check(self):
+        now = time.monotonic()
+
+        for worker in list(self.workers.values()):
+            if worker.process.is_alive():
+                continue
+
+            logger.warning(
+                f"Worker {worker.slot} exited with code {worker.process.exitcode}"
+            )
+            self._reap(worker)
+
+            worker.restarts = [t for t in worker.restarts if now - t < RESTART_WINDOW]
+            worker.restarts.append(now)
+
+            if len(worker.restarts) > MAX_RESTARTS:
+                self._retire(worker)
+            else:
+                WORKER_RESTARTS.inc()
+                self._spawn(worker)
+
+        WORKERS_ALIVE.set(len(self.workers))
+
+    async def run(self, interval: float = 1.0):
+        self._loop = asyncio.get_running_loop()
+
+        for worker in self.workers.values():
+            self._spawn(worker)
+
+        self._channels = [
+            self._loop.create_task(keep_running(f"{instance}: upstream", channel.run))
+            for instance, channel in self.upstreams.items()
+        ]
+
+        while True:
+            self._check()
+            await asyncio.sleep(interval)
+
+
+if __name__ == "__main__":
+    config.read("config.ini")
+
+    logconfig.setup(
+        config.get("logging", "level", fallback="INFO"),
+        config.getfloat("logging", "interval", fallback=5),
+    )
+
+    metrics_port = config.getint("metrics", "port", fallback=9108)
+    if metrics_port:
+        metrics.serve(metrics_port)
+
+    machines = load_machines()
+    upstream = config.get(
+        "gateway", "upstream", fallback="ws://localhost:8000/{instance}/ws"
+    )
+    workers = config.getint(
+        "gateway", "workers", fallback=multiprocessing.cpu_count()
+    )
+    timeout = config.getfloat("gateway", "timeout", fallback=10)
+    logger.info(f"Gateway serving {len(machines)} machines on {workers} workers")
+
+    supervisor = Supervisor(machines, upstream, workers, timeout)
+    asyncio.run(supervisor.run())
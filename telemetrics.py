@@ -1,21 +1,23 @@
 #!/usr/bin/env python3
 
+import array
 import datetime
-import subprocess
+import gzip
+import json
 import time
 import logging
 import configparser
 import httpx
 import psutil
 
+from uuid import UUID
+
 from pydantic import BaseModel
+import logconfig
+from hostfacts import FACTS
 from rms import RemoteManagementService
 
 
-logging.basicConfig(
-    level=logging.DEBUG,
-)
-
 config = configparser.ConfigParser()
 logger = logging.getLogger()
 
@@ -30,12 +32,12 @@ class Telemetry(BaseModel):
 
 
 class HostConfig(BaseModel):
-    # instance: UUID # TODO: Add this field
+    instance: UUID
     name: str | None = None
     hostname: str
     kernel: str
-    # memory_total: int # TODO: Add this field
-    # cpu_count: int # TODO: Add this field
+    memory_total: int
+    cpu_count: int
     model: str
     version: int
     serial_number: str
@@ -52,30 +54,104 @@ def remote_manifest():
 
     rms = RemoteManagementService(host, auth, instance)
     manifest = rms.fetch_manifest()
-    print(f"Manifest: {manifest}")
+    logger.info(f"Manifest: {manifest}")
 
 
 def create_telemetry() -> Telemetry:
-    def seconds_elapsed() -> int:
-        return round(time.time() - psutil.boot_time())
-
     telemetry = Telemetry(
         memory_used=psutil.virtual_memory().percent,
         disk_used=psutil.disk_usage("/").percent,
         cpu_freq=psutil.cpu_freq().current,
         cpu_load=psutil.getloadavg(),
-        uptime=seconds_elapsed(),
+        uptime=FACTS.uptime(),
     )
     return telemetry
 
 
-def create_host_config() -> HostConfig:
-    hostname = subprocess.check_output(["hostname"]).decode().strip()
-    kernel = subprocess.check_output(["uname", "-r"]).decode().strip()
+class TelemetryBuffer:
+    """
+    Ring buffer of telemetry samples, one array of doubles per field.
+
+    When the buffer is full the oldest samples are overwritten, so a long
+    upload outage costs resolution instead of memory.
+    """
 
+    FIELDS = (
+        "timestamp",
+        "memory_used",
+        "disk_used",
+        "cpu_freq",
+        "cpu_load1",
+        "cpu_load5",
+        "cpu_load15",
+        "uptime",
+    )
+
+    def __init__(self, capacity: int = 3600):
+        self.capacity = capacity
+        self.columns = {
+            field: array.array("d", bytes(8 * capacity)) for field in self.FIELDS
+        }
+
+        self._start = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, telemetry: Telemetry, timestamp: float | None = None):
+        values = (
+            time.time() if timestamp is None else timestamp,
+            telemetry.memory_used,
+            telemetry.disk_used,
+            telemetry.cpu_freq,
+            *telemetry.cpu_load,
+            telemetry.uptime,
+        )
+
+        index = (self._start + self._count) % self.capacity
+        for field, value in zip(self.FIELDS, values):
+            self.columns[field][index] = value
+
+        if self._count < self.capacity:
+            self._count += 1
+        else:
+            self._start = (self._start + 1) % self.capacity
+
+    def batch(self) -> dict:
+        """
+        Returns the buffered samples column by column, with per field
+        minimum, maximum and mean over the window.
+        """
+        indices = [(self._start + i) % self.capacity for i in range(self._count)]
+
+        samples = {}
+        aggregates = {}
+        for field, column in self.columns.items():
+            values = [column[i] for i in indices]
+            samples[field] = values
+
+            if field != "timestamp" and values:
+                aggregates[field] = {
+                    "min": min(values),
+                    "max": max(values),
+                    "mean": sum(values) / len(values),
+                }
+
+        return {"samples": samples, "aggregates": aggregates}
+
+    def clear(self):
+        self._start = 0
+        self._count = 0
+
+
+def create_host_config(instance: UUID) -> HostConfig:
     host_config = HostConfig(
-        hostname=hostname,
-        kernel=kernel,
+        instance=instance,
+        hostname=FACTS.hostname,
+        kernel=FACTS.kernel,
+        memory_total=FACTS.memory_total,
+        cpu_count=FACTS.cpu_count,
         model="test",
         version=378,
         serial_number="test",
@@ -86,29 +162,60 @@ def create_host_config() -> HostConfig:
 if __name__ == "__main__":
     config.read("config.ini")
 
+    logconfig.setup(
+        config.get("logging", "level", fallback="INFO"),
+        config.getfloat("logging", "interval", fallback=5),
+    )
+
     instance = config["glonax"]["instance"]
 
     headers = {"Authorization": "Bearer " + config["server"]["authkey"]}
 
+    # Reuse one connection for all uploads
+    session = httpx.Client(headers=headers, timeout=15)
+
     def update_host():
-        data = create_host_config().model_dump()
+        data = create_host_config(UUID(instance)).model_dump(mode="json")
 
         host = config["server"]["host"].rstrip("/")
 
-        r = httpx.put(f"{host}/{instance}/host", json=data, headers=headers)
+        r = session.put(f"{host}/{instance}/host", json=data)
         r.raise_for_status()
 
+    sample_interval = 1 / config.getfloat("telemetry", "rate", fallback=1)
+    upload_interval = config.getfloat("telemetry", "window", fallback=60)
+
+    buffer = TelemetryBuffer(capacity=round(upload_interval / sample_interval) * 10)
+
     def update_telemetry():
-        data = create_telemetry().model_dump()
+        data = gzip.compress(json.dumps(buffer.batch()).encode("utf-8"))
 
         host = config["server"]["host"].rstrip("/")
 
-        r = httpx.post(f"{host}/{instance}/telemetry", json=data, headers=headers)
+        r = session.post(
+            f"{host}/{instance}/telemetry/batch",
+            content=data,
+            headers={
+                "Content-Type": "application/json",
+                "Content-Encoding": "gzip",
+            },
+        )
         r.raise_for_status()
 
+        buffer.clear()
+
     update_host()
 
+    next_upload = time.monotonic() + upload_interval
     while True:
-        update_telemetry()
+        buffer.append(create_telemetry())
+
+        if time.monotonic() >= next_upload:
+            next_upload += upload_interval
+            try:
+                update_telemetry()
+            except httpx.HTTPError as e:
+                # Samples stay buffered until the next window
+                logger.error(f"Error: {e}")
 
-        time.sleep(60)
+        time.sleep(sample_interval)
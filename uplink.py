@@ -0,0 +1,152 @@
+import collections
+import logging
+import threading
+import time
+from typing import Any, Callable, Hashable
+
+from glonax import metrics
+
+logger = logging.getLogger(__name__)
+
+QUEUE_SECONDS = metrics.REGISTRY.histogram(
+    "bridge_uplink_queue_seconds", "Time messages wait in the uplink queue"
+)
+COALESCED = metrics.REGISTRY.counter(
+    "bridge_uplink_coalesced_total",
+    "Messages replaced by a newer value before sending",
+    ("topic",),
+)
+DROPPED = metrics.REGISTRY.counter(
+    "bridge_uplink_dropped_total", "Messages dropped on a full queue", ("topic",)
+)
+PENDING = metrics.REGISTRY.gauge(
+    "bridge_uplink_pending", "Messages waiting in the uplink queue"
+)
+
+
+def _topic(key: Hashable):
+    return key[0] if isinstance(key, tuple) else key
+
+
+class UplinkSender:
+    """
+    Sends upstream messages from a dedicated thread.
+
+    Producers call `submit` with a key, usually the topic and module name.
+    A message that is still waiting to be sent is replaced by a newer one
+    with the same key, so only the latest value goes out. The queue is
+    bounded; when it is full the oldest pending message is dropped. `submit`
+    never blocks on the network.
+
+    The sender thread passes every pending message to `send` as a list. With
+    a `batch_interval` it waits that many seconds between sends, so all
+    messages of a tick go out together.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[list], None],
+        maxsize: int = 1024,
+        batch_interval: float = 0.0,
+    ):
+        self.send = send
+        self.maxsize = maxsize
+        self.batch_interval = batch_interval
+
+        self._queue: collections.OrderedDict[Hashable, tuple[Any, float]] = (
+            collections.OrderedDict()
+        )
+        self._condition = threading.Condition()
+        self._running = False
+        self._thread: threading.Thread | None = None
+
+        self.submitted = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.sent = 0
+        self.failed = 0
+        self.high_watermark = 0
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="uplink", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float | None = None):
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+
+        if self._thread:
+            self._thread.join(timeout)
+
+    def submit(self, key: Hashable, message: Any):
+        """
+        Queues a message for sending, replacing a pending message with the same key.
+        """
+        with self._condition:
+            self.submitted += 1
+
+            if key in self._queue:
+                self.coalesced += 1
+                COALESCED.labels(_topic(key)).inc()
+            elif len(self._queue) >= self.maxsize:
+                dropped, _ = self._queue.popitem(last=False)
+                self.dropped += 1
+                DROPPED.labels(_topic(dropped)).inc()
+
+            # Replacing a value keeps the position of the key in the queue,
+            # so a busy topic cannot starve the others.
+            self._queue[key] = (message, time.monotonic())
+            self.high_watermark = max(self.high_watermark, len(self._queue))
+            PENDING.set(len(self._queue))
+
+            self._condition.notify()
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def stats(self) -> dict:
+        with self._condition:
+            return {
+                "pending": len(self._queue),
+                "submitted": self.submitted,
+                "coalesced": self.coalesced,
+                "dropped": self.dropped,
+                "sent": self.sent,
+                "failed": self.failed,
+                "high_watermark": self.high_watermark,
+            }
+
+    def _drain(self) -> list:
+        with self._condition:
+            while self._running and not self._queue:
+                self._condition.wait()
+
+            now = time.monotonic()
+            queue_seconds = QUEUE_SECONDS.labels()
+
+            messages = []
+            for message, submitted_at in self._queue.values():
+                messages.append(message)
+                queue_seconds.observe(now - submitted_at)
+
+            self._queue.clear()
+            PENDING.set(0)
+            return messages
+
+    def _run(self):
+        while True:
+            messages = self._drain()
+            if not messages:
+                break
+
+            try:
+                self.send(messages)
+                self.sent += len(messages)
+            except Exception as e:
+                self.failed += len(messages)
+                logger.error(f"Error: {e}")
+
+            if self.batch_interval:
+                time.sleep(self.batch_interval)